@@ -0,0 +1,123 @@
+import heapq
+import mmap
+import os
+import re
+import sys
+import time
+from datetime import datetime
+from tracing import Histogram
+
+# --- REALTIMESTT LOG ANALYZER ---
+# Usage: python analyze_stt_log.py [logs/klix.jsonl | realtimesst.log] [--gap MINUTES]
+# Memory-maps the log and scans it with compiled bytes regexes, so only the lines we care
+# about are ever decoded and memory stays flat whatever the file size. Pairs each
+# "State changed from 'A' to 'B'" with the transition that entered A, giving the time spent
+# recording / transcribing / listening, and counts engine starts and model-init failures.
+# A work session is a run of engine starts less than --gap minutes apart; every start after
+# the first in a session is a restart.
+
+SESSION_GAP_MIN = 30
+BUCKETS_S = [0.05, 0.1, 0.2, 0.35, 0.5, 0.75, 1, 1.5, 2, 3, 5, 7.5, 10, 15, 20, 30, 60, 120, 300, 600]
+STATES = [("recording", "recording"), ("transcribing", "transcribing"), ("listen", "listening")]
+SHOW_SESSIONS = 20
+
+# One pattern per event, each starting with a literal so re can skip ahead with a fast
+# substring search; the streams are merged back into file order with heapq.merge.
+EVENTS = [
+    ("state", re.compile(rb"State changed from '(\w+)' to '(\w+)'")),
+    ("start", re.compile(rb"Starting RealTimeSTT")),
+    ("failure", re.compile(rb"Error initializing")),
+    ("model", re.compile(rb"completed transcription in ([\d.]+)")),
+]
+STAMP = re.compile(rb"(\d{4}-\d\d-\d\d) (\d\d):(\d\d):(\d\d\.\d+)")
+
+
+def _events(data, kind, pattern):
+    for m in pattern.finditer(data): yield m.start(), kind, m
+
+
+class Session:
+    def __init__(self, started):
+        self.started = started
+        self.last = started
+        self.starts = 0
+        self.init_failures = 0
+        self.utterances = 0
+
+
+def analyze(path, gap=SESSION_GAP_MIN * 60):
+    durations = {name: Histogram(BUCKETS_S) for name, _ in STATES}
+    durations["model"] = Histogram(BUCKETS_S)  # whisper's own "completed transcription in" time
+    state_of = {state: name for name, state in STATES}
+    entered = {}
+    sessions = []
+    midnight = {}  # date bytes -> epoch seconds, so each line costs three int() calls, not a strptime
+
+    size = os.path.getsize(path)
+    if not size: return durations, sessions, 0
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        streams = [_events(data, kind, pattern) for kind, pattern in EVENTS]
+        for pos, kind, m in heapq.merge(*streams, key=lambda e: e[0]):
+            line = data.rfind(b"\n", 0, pos) + 1
+            stamp = STAMP.search(data, line, line + 32)  # plain text: line start, JSONL: inside "ts"
+            if not stamp: continue  # traceback / continuation line
+            date, hh, mm, ss = stamp.groups()
+            day = midnight.get(date)
+            if day is None: day = midnight[date] = datetime.strptime(date.decode(), "%Y-%m-%d").timestamp()
+            t = day + int(hh) * 3600 + int(mm) * 60 + float(ss)
+
+            if kind == "start":
+                if not sessions or t - sessions[-1].last > gap: sessions.append(Session(t))
+                sessions[-1].starts += 1
+                entered = {}  # a new engine: nothing carries over from the last run
+            elif not sessions: sessions.append(Session(t))  # log starts mid-run
+            session = sessions[-1]
+            session.last = t
+
+            if kind == "state":
+                old, new = m.group(1).decode(), m.group(2).decode()
+                if old in entered and old in state_of: durations[state_of[old]].add(t - entered.pop(old))
+                entered[new] = t
+                if new == "transcribing": session.utterances += 1
+            elif kind == "failure": session.init_failures += 1
+            elif kind == "model": durations["model"].add(float(m.group(1)))
+    return durations, sessions, size
+
+
+def main():
+    args = sys.argv[1:]
+    gap = SESSION_GAP_MIN
+    if "--gap" in args:
+        i = args.index("--gap")
+        gap = float(args[i + 1])
+        del args[i:i + 2]
+    path = args[0] if args else next((p for p in ("logs/klix.jsonl", "realtimesst.log") if os.path.exists(p)), "realtimesst.log")
+    if not os.path.exists(path):
+        print(f"❌ Log not found: {path}")
+        sys.exit(1)
+
+    started = time.perf_counter()
+    durations, sessions, size = analyze(path, gap * 60)
+    elapsed = time.perf_counter() - started
+
+    print("\n--- STATE DURATIONS (seconds, bucketed) ---")
+    print(f"{'state':<14}{'n':>7}{'mean':>8}{'p50≤':>8}{'p95≤':>8}{'p99≤':>8}{'max':>9}")
+    for name, h in durations.items():
+        if not h.n:
+            print(f"{name:<14}{0:>7}")
+            continue
+        print(f"{name:<14}{h.n:>7}{h.total / h.n:8.2f}{h.percentile(50):8.2f}{h.percentile(95):8.2f}{h.percentile(99):8.2f}{h.max:9.2f}")
+
+    print(f"\n--- SESSIONS (engine starts < {gap:g} min apart) ---")
+    print(f"{'started':<20}{'starts':>7}{'restarts':>9}{'init fail':>10}{'utterances':>11}")
+    for s in sessions[-SHOW_SESSIONS:]:
+        print(f"{datetime.fromtimestamp(s.started).strftime('%Y-%m-%d %H:%M'):<20}{s.starts:>7}{max(0, s.starts - 1):>9}{s.init_failures:>10}{s.utterances:>11}")
+    if len(sessions) > SHOW_SESSIONS: print(f"... {len(sessions) - SHOW_SESSIONS} earlier sessions not shown")
+    starts = sum(s.starts for s in sessions)
+    failures = sum(s.init_failures for s in sessions)
+    print(f"total: {len(sessions)} sessions, {starts} engine starts, {sum(max(0, s.starts - 1) for s in sessions)} restarts, {failures} model-init failures")
+    print(f"\nscanned {size / 1e6:.1f} MB in {elapsed:.2f}s ({size / 1e6 / max(elapsed, 1e-9):.0f} MB/s)")
+
+
+if __name__ == "__main__":
+    main()
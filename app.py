@@ -3,21 +3,48 @@ os.environ["KMP_DUPLICATE_LIB_OK"] = "TRUE"
 import tkinter as tk
 from tkinter import ttk, font, simpledialog, messagebox
 import threading
-import queue
 import os
 import time
-import re
 from datetime import datetime
 from dotenv import load_dotenv
-from openai import OpenAI
-from RealtimeSTT import AudioToTextRecorder
 import styles
 import backend  # <--- IMPORTING YOUR ENGINE
+from scheduler import AIScheduler, Speculator
+from memory import ConversationMemory
+from cue_cache import CueCache
+from db_writer import DBWriter
+import journal
+from ui_pump import UpdatePump
+from panel_archive import PanelArchive
+from notes import NoteStore
+from theme_engine import ThemeEngine
+from tracing import LatencyTracer
+from metering import Meter
+import missions
+import objections
+import startup
+import applog
+from lazy import lazy
+
+openai = lazy("openai")  # imported on first use, not at window start (see lazy.py)
+log = applog.get("hud")
+ai_log = applog.get("ai")
 
 # --- CONFIGURATION ---
 load_dotenv()
-HISTORY_SIZE = 20
+FORCE_INPUT = "USER REQUESTS ADVICE"
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", 3000))  # whole prompt: mission + context + history
 LOG_DIR = "logs"
+METER_MS = 66           # input meters redraw at ~15 fps, whatever the audio chunk rate
+METER_WIDTH = 90
+METER_RANGE_DB = 60.0   # meter spans -60..0 dBFS
+PANEL_MAX_LINES = 400   # lines kept in each Tk Text panel; older ones go to logs/panels/
+PANEL_TRIM_LINES = 100  # trimmed (and loaded back) in blocks of this many lines
+STREAM_CUES = os.getenv("STREAM_CUES", "1") != "0"  # push [CUE] tokens to the HUD as they arrive
+SPECULATE = os.getenv("SPECULATE", "1") != "0"      # draft cues from realtime partials while they talk
+MATCH_OBJECTIONS = os.getenv("MATCH_OBJECTIONS", "1") != "0"  # provisional cue from the local objection index
+TRACE_OVERLAY = os.getenv("TRACE_OVERLAY", "0") != "0"  # per-stage latency of the last cue in the header (F2 toggles)
+TRACE_EXPORT = os.getenv("TRACE_EXPORT", "0") != "0"    # one JSONL line per traced cue in logs/traces/
 
 if not os.path.exists(LOG_DIR):
     os.makedirs(LOG_DIR)
@@ -104,50 +131,117 @@ class ContextDialog(tk.Toplevel):
 
 # --- CUSTOM WIDGETS ---
 class DarkScrolledText(tk.Frame):
-    def __init__(self, parent, **kwargs):
+    def __init__(self, parent, archive=None, **kwargs):
         super().__init__(parent)
         self.scrollbar = ttk.Scrollbar(self, orient="vertical", style="Vertical.TScrollbar")
         self.scrollbar.pack(side="right", fill="y")
         if 'highlightthickness' in kwargs: del kwargs['highlightthickness']
-        self.text = tk.Text(self, yscrollcommand=self.scrollbar.set, highlightthickness=1, relief="flat", **kwargs)
+        self.text = tk.Text(self, yscrollcommand=self._on_yscroll, highlightthickness=1, relief="flat", **kwargs)
         self.text.pack(side="left", fill="both", expand=True)
-        self.scrollbar.config(command=self.text.yview)
+        self.scrollbar.config(command=self._on_scrollbar)
+
+        # Bounded window: only the newest lines live in the widget, the rest in `archive`
+        self.archive = PanelArchive(archive) if archive else None
+        self.shown_from = 0       # first archive block currently loaded back into the widget
+        self.loaded_lines = []    # line counts of those loaded-back blocks, oldest first
+        self.user_scrolled = False
+        for seq in ("<MouseWheel>", "<Button-4>"): self.text.bind(seq, self._on_wheel, add="+")
     
-    def insert(self, *a): self.text.insert(*a)
-    def delete(self, *a): self.text.delete(*a)
+    def insert(self, index, *a):
+        self.text.insert(index, *a)
+        if self.archive and index == tk.END: self._trim()
+    def delete(self, *a):
+        self.text.delete(*a)
+        if self.archive and self.text.index("end-1c") == "1.0":
+            self.shown_from, self.loaded_lines = len(self.archive), []
     def see(self, *a): self.text.see(*a)
     def get(self, *a): return self.text.get(*a)
     def tag_config(self, *a, **k): self.text.tag_config(*a, **k)
     def config(self, *a, **k): self.text.config(*a, **k)
 
+    def _line_count(self): return int(self.text.index("end-1c").split(".")[0])
+
+    def _trim(self):
+        lines = self._line_count()
+        following = self.text.yview()[1] >= 0.999
+        # While the rep reads scroll-back, let the window grow to 2x before yanking lines away
+        if lines <= PANEL_MAX_LINES + PANEL_TRIM_LINES or (not following and lines <= 2 * PANEL_MAX_LINES): return
+        while self.loaded_lines and lines > PANEL_MAX_LINES:
+            n = self.loaded_lines.pop(0)  # already archived, just drop it
+            self.text.delete("1.0", f"{n + 1}.0")
+            self.shown_from += 1
+            lines -= n
+        if lines > PANEL_MAX_LINES + PANEL_TRIM_LINES // 2:
+            self.archive.append(self.text.get("1.0", f"{PANEL_TRIM_LINES + 1}.0"))
+            self.text.delete("1.0", f"{PANEL_TRIM_LINES + 1}.0")
+            self.shown_from = len(self.archive)
+
+    def _on_scrollbar(self, *a):
+        self.user_scrolled = True
+        self.text.yview(*a)
+
+    def _on_wheel(self, event):
+        self.user_scrolled = True
+
+    def _on_yscroll(self, first, last):
+        self.scrollbar.set(first, last)
+        if self.archive and self.user_scrolled and float(first) <= 0.0 and self.shown_from > 0:
+            self.user_scrolled = False
+            self.after_idle(self._load_previous)
+
+    def _load_previous(self):
+        if self.shown_from <= 0: return
+        self.shown_from -= 1
+        block = self.archive.read(self.shown_from)
+        n = block.count("\n")
+        self.text.insert("1.0", block)
+        self.loaded_lines.insert(0, n)
+        self.text.yview(f"{n + 1}.0")  # keep the line the rep was looking at in place
+
 class ModernHUD(tk.Tk):
-    def __init__(self, recorder):
+    def __init__(self, recorder=None):
         super().__init__()
-        self.recorder = recorder
+        self.recorder = None
         self.title("KlixOS - Enterprise Orchestrator")
         self.geometry("1200x800")
         
         self.current_theme = "dark"
-        self.transcript_history = []
+        self.transcript_history = ConversationMemory(lambda summary, lines: backend.summarize_history(self.client, summary, lines), budget=PROMPT_TOKEN_BUDGET)
         self.active_mission_name = "NONE"
-        self.mission_context = "NO MISSION SELECTED"
+        self.mission = None  # missions.Mission, compiled once per file
         self.cue_mode = "SCRIPT"
-        self.unique_notes = set()
+        self.unique_notes = NoteStore()
         self.lead_data_context = "" 
+        self.stage = missions.StageTracker()
+        self.objection_index = None  # objections.ObjectionIndex for the active mission
+        self._cue_streaming = False
+        self._cue_stream_text = []
         
         self.client = None
-        self.gui_queue = queue.Queue()
+        self.gui_queue = UpdatePump(self, self._handle_message)
+        self.ai_scheduler = AIScheduler(self._run_ai, self.gui_queue.put)
+        self.speculator = Speculator(self.ai_scheduler, self._run_ai, lambda cue: self.stage.observe(cue))
+        self.prompt_builder = backend.PromptBuilder()
+        self.cue_cache = CueCache()
+        self.journal = journal.CallJournal()
+        self.tracer = LatencyTracer(export=TRACE_EXPORT, on_trace=self._show_trace)
+        self.meters = {"THEM": Meter(), "ME": Meter()}  # ME only runs with dual capture
+        self._meter_drawn = {}
+        self.db_writer = DBWriter(lambda: os.getenv("DATABASE_URL"), on_result=lambda ok, name, msg: self.gui_queue.put(("db", (ok, name, msg))))
 
         self._init_fonts()
         self._init_styles()
         self._build_ui()
-        self._init_openai_robust()
+        self._bind_theme()
+        self.after_idle(self._init_openai_robust)  # the openai import (~0.4 s) stays out of time-to-window
         self.apply_theme("dark", animate=False) 
 
-        threading.Thread(target=self._audio_loop, daemon=True).start()
-        self.after(50, self._process_queue)
+        if recorder: self.attach_recorder(recorder)
+        self.after(0, self.gui_queue.start)
         self.bind('<space>', lambda e: self.force_ai_update(None))
+        self.bind('<F2>', lambda e: self.toggle_trace_overlay())
         self.protocol("WM_DELETE_WINDOW", self.on_close)
+        threading.Thread(target=self._scan_journals, name="journal-scan", daemon=True).start()
 
     def _init_fonts(self):
         self.font_header = font.Font(family="Segoe UI", size=10, weight="bold")
@@ -172,11 +266,34 @@ class ModernHUD(tk.Tk):
         self.btn_context.pack(side="left", padx=5)
 
         self.menu_missions = tk.Menu(self, tearoff=0)
-        self.menu_missions.add_command(label="SELL DRONES", command=lambda: self.load_mission("mission_sell_drones.txt"))
-        self.menu_missions.add_command(label="PITCH LEADS", command=lambda: self.load_mission("mission_pitch_leads.txt"))
+        for path, mission in missions.discover():  # every mission*.txt in MISSION_DIR, validated here
+            if isinstance(mission, missions.MissionError):
+                log.error("❌ MISSION SKIPPED: %s", mission)
+                self.menu_missions.add_command(label=f"{missions.mission_name(path).replace('_', ' ')} (invalid)", state="disabled")
+                continue
+            for warning in mission.warnings: log.warning("⚠️ MISSION %s: %s", mission.name, warning)
+            self.menu_missions.add_command(label=mission.name.replace("_", " "), command=lambda path=path: self.load_mission(path))
 
         self.lbl_status = tk.Label(self.header, text="SELECT MISSION", font=self.font_header)
         self.lbl_status.pack(side="left", padx=20)
+        self.lbl_stt = tk.Label(self.header, text="STT: STARTING", font=self.font_timestamp, fg=styles.SHARED["warning"])
+        self.lbl_stt.pack(side="left", padx=10)
+        self.lbl_trace = tk.Label(self.header, text=self.tracer.overlay_text(), font=self.font_timestamp)
+        if TRACE_OVERLAY: self.lbl_trace.pack(side="left", padx=10)
+        self.meter_widgets = {}
+        for name in self.meters:
+            frame = tk.Frame(self.header)
+            # The status has its own label: its colour is the meter's, the name's is the theme's
+            status = tk.Label(frame, text="", font=self.font_timestamp, width=8, anchor="e", fg=styles.SHARED["danger"])
+            status.pack(side="left")
+            label = tk.Label(frame, text=name, font=self.font_timestamp, width=4, anchor="e")
+            label.pack(side="left")
+            canvas = tk.Canvas(frame, width=METER_WIDTH, height=10, highlightthickness=0)
+            canvas.pack(side="left", padx=(4, 0))
+            bar = canvas.create_rectangle(0, 0, 0, 10, width=0, fill=styles.SHARED["success"])
+            floor = canvas.create_line(0, 0, 0, 10)
+            hold = canvas.create_line(0, 0, 0, 10, fill=styles.SHARED["warning"])
+            self.meter_widgets[name] = (frame, label, status, canvas, bar, floor, hold)
         
         self.btn_theme = tk.Button(self.header, text="☀️", bg=styles.SHARED["warning"], fg="white", font=("Segoe UI Emoji", 12), relief="flat", padx=10, pady=0, borderwidth=0, command=self.toggle_theme)
         self.btn_theme.pack(side="right", padx=5)
@@ -196,14 +313,14 @@ class ModernHUD(tk.Tk):
         self.frm_transcript_container.pack_propagate(False) 
         self.lbl_trans = tk.Label(self.frm_transcript_container, text="LIVE TRANSCRIPT", fg=styles.SHARED["accent"], font=("Segoe UI", 9, "bold"))
         self.lbl_trans.pack(anchor="w")
-        self.txt_transcript = DarkScrolledText(self.frm_transcript_container, font=self.font_ui_text, height=12, padx=15, pady=10)
+        self.txt_transcript = DarkScrolledText(self.frm_transcript_container, archive="transcript", font=self.font_ui_text, height=12, padx=15, pady=10)
         self.txt_transcript.pack(fill="both", expand=True)
 
         self.frm_cues_container = tk.Frame(self.left_col)
         self.frm_cues_container.pack(side="top", fill="both", expand=True)
         self.lbl_cues = tk.Label(self.frm_cues_container, text="AI STRATEGY & CUES", fg=styles.SHARED["accent"], font=self.font_header)
         self.lbl_cues.pack(anchor="w", pady=(0, 5))
-        self.txt_cue = DarkScrolledText(self.frm_cues_container, font=self.font_cue, padx=15, pady=15)
+        self.txt_cue = DarkScrolledText(self.frm_cues_container, archive="cues", font=self.font_cue, padx=15, pady=15)
         self.txt_cue.pack(fill="both", expand=True)
         self.txt_cue.tag_config("dim", font=self.font_timestamp)
 
@@ -211,7 +328,7 @@ class ModernHUD(tk.Tk):
         self.right_col.pack(side="right", fill="y")
         self.right_col.pack_propagate(False)
         tk.Label(self.right_col, text="LIVE NOTEPAD", fg=styles.SHARED["success"], font=self.font_header).pack(anchor="w", pady=(0, 10))
-        self.txt_notepad = DarkScrolledText(self.right_col, font=self.font_mono, padx=10, pady=10)
+        self.txt_notepad = DarkScrolledText(self.right_col, archive="notes", font=self.font_mono, padx=10, pady=10)
         self.txt_notepad.pack(fill="both", expand=True)
         self.txt_notepad.insert("1.0", "• Notes will appear here...\n")
 
@@ -227,107 +344,186 @@ class ModernHUD(tk.Tk):
         new_theme = "light" if self.current_theme == "dark" else "dark"
         self.apply_theme(new_theme, animate=True)
 
+    def _bind_theme(self):
+        """Registers which palette key drives which widget option; apply_theme only touches what changed."""
+        self.theme = ThemeEngine(self)
+        bind = self.theme.bind
+        bind(self.configure, bg="bg")
+        bind(self.header.config, bg="header")
+        for frame in (self.body, self.left_col, self.frm_cues_container, self.frm_transcript_container): bind(frame.config, bg="bg")
+        bind(self.right_col.config, bg="panel")
+        for widget in (self.txt_transcript, self.txt_notepad, self.txt_cue):
+            bind(widget.text.config, bg="panel", fg="text", insertbackground="text", highlightbackground="border", highlightcolor="border")
+        bind(self.btn_theme.config, text="icon")
+        bind(self.lbl_status.config, bg="header", fg="text_dim")
+        bind(self.lbl_stt.config, bg="header")
+        bind(self.lbl_trace.config, bg="header", fg="text_dim")
+        for frame, label, status, canvas, _, floor, _ in self.meter_widgets.values():
+            bind(frame.config, bg="header")
+            bind(label.config, bg="header", fg="text_dim")
+            bind(status.config, bg="header")
+            bind(canvas.config, bg="panel")
+            bind(lambda floor=floor, canvas=canvas, **k: canvas.itemconfig(floor, **k), fill="text_dim")
+        for lbl in (self.lbl_trans, self.lbl_cues): bind(lbl.config, bg="bg")
+        bind(self.menu_missions.config, bg="menu_bg", fg="menu_fg")
+        bind(lambda **k: self.style.configure("Vertical.TScrollbar", **k), background="scroll_fg", troughcolor="scroll_bg", bordercolor="scroll_bg")
+        bind(lambda **k: self.txt_cue.tag_config("dim", **k), foreground="text_dim")
+        bind(lambda **k: self.txt_notepad.tag_config("key_bold", **k), foreground="key_bold")
+        # Never change with the theme
+        self.btn_missions.config(bg=styles.SHARED["accent"], fg="white")
+        self.btn_mode.config(bg="#444", fg="white")
+
     def apply_theme(self, theme_name, animate=False):
-        self.current_theme = theme_name
-        target = styles.THEMES[theme_name]
-        def interpolate(c1, c2, t):
-            r1, g1, b1 = int(c1[1:3],16), int(c1[3:5],16), int(c1[5:7],16)
-            r2, g2, b2 = int(c2[1:3],16), int(c2[3:5],16), int(c2[5:7],16)
-            r = int(r1 + (r2-r1)*t)
-            g = int(g1 + (g2-g1)*t)
-            b = int(b1 + (b2-b1)*t)
-            return f"#{r:02x}{g:02x}{b:02x}"
-        def update_colors(palette):
-            self.configure(bg=palette["bg"])
-            self.header.config(bg=palette["header"])
-            self.body.config(bg=palette["bg"])
-            self.left_col.config(bg=palette["bg"])
-            for widget in [self.txt_transcript, self.txt_notepad, self.txt_cue]:
-                widget.config(bg=palette["panel"]) 
-                widget.text.config(bg=palette["panel"], fg=palette["text"], insertbackground=palette["text"], highlightbackground=palette["border"], highlightcolor=palette["border"])
-            self.btn_theme.config(text=palette["icon"])
-            for lbl in [self.lbl_status, self.lbl_trans, self.lbl_cues]:
-                bg_col = palette["header"] if lbl in self.header.winfo_children() else palette["bg"]
-                if lbl == self.lbl_trans: bg_col = palette["bg"] 
-                fg_col = styles.SHARED["accent"] if lbl in [self.lbl_trans, self.lbl_cues] else palette["text_dim"]
-                if lbl.master == self.frm_transcript_container or lbl.master == self.frm_cues_container: bg_col = palette["bg"]
-                lbl.config(bg=bg_col, fg=fg_col)
-            self.frm_cues_container.config(bg=palette["bg"])
-            self.frm_transcript_container.config(bg=palette["bg"])
-            self.right_col.config(bg=palette["panel"])
-            self.btn_missions.config(bg=styles.SHARED["accent"], fg="white")
-            self.btn_mode.config(bg="#444", fg="white")
-            self.menu_missions.config(bg=palette["menu_bg"], fg=palette["menu_fg"])
-            self.style.configure("Vertical.TScrollbar", background=palette["scroll_fg"], troughcolor=palette["scroll_bg"], bordercolor=palette["scroll_bg"])
-            self.txt_cue.tag_config("dim", foreground=palette["text_dim"])
-            self.txt_notepad.tag_config("key_bold", foreground=styles.SHARED["key_highlight"] if theme_name == "dark" else "#0055bb")
-            
-        if not animate:
-            update_colors(target)
-        else:
-            steps = 10; delay = 20
-            start_colors = styles.THEMES["light" if theme_name == "dark" else "dark"]
-            def step_anim(i):
-                if i > steps: return
-                t = i / steps
-                inter_palette = {k: interpolate(start_colors[k], target[k], t) for k in target if target[k].startswith("#")}
-                inter_palette["icon"] = target["icon"]
-                inter_palette["menu_bg"] = target["menu_bg"]
-                inter_palette["menu_fg"] = target["menu_fg"]
-                update_colors(inter_palette)
-                self.after(delay, lambda: step_anim(i+1))
-            step_anim(0)
+        previous, self.current_theme = self.current_theme, theme_name
+        if animate and previous != theme_name: self.theme.fade(previous, theme_name)
+        else: self.theme.apply_all(styles.THEMES[theme_name])
 
     def _init_openai_robust(self):
+        """Key check on the Tk thread (it may prompt); the openai import and client are built on a worker."""
         if backend.ensure_api_key():
-            self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-            print("DEBUG: OpenAI Client Initialized.")
+            def create():
+                self.client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+                log.debug("OpenAI Client Initialized.")
+            threading.Thread(target=create, name="openai-init", daemon=True).start()
         else:
-            print("CRITICAL ERROR: Still no API Key. AI features disabled.")
+            log.critical("CRITICAL ERROR: Still no API Key. AI features disabled.")
             self.gui_queue.put(("ai", "ERROR: NO API KEY. RESTART APP."))
 
+    def attach_recorder(self, recorder):
+        """Called once the STT engine has loaded (in the background, after the window is up)."""
+        self.recorder = recorder
+        if SPECULATE: self.recorder.on_realtime_transcription_stabilized = self.speculator.partial
+        self.recorder.on_recording_stop = lambda: self.tracer.speech_end(getattr(self.recorder, "post_speech_silence_duration", 0.0))
+        self.recorder.on_me = self._on_rep_utterance  # only called by dual capture (REP_MIC_NAME)
+        self.recorder.on_recorded_chunk = self.meters["THEM"].update
+        meters = ["THEM"]
+        if hasattr(self.recorder, "on_me_chunk"):
+            self.recorder.on_me_chunk = self.meters["ME"].update
+            meters.append("ME")
+        for name in meters: self.meter_widgets[name][0].pack(side="left", padx=6, after=self.lbl_stt)
+        self.after(METER_MS, self._poll_meters)
+        self.lbl_stt.config(text="STT: READY", fg=styles.SHARED["success"])
+        threading.Thread(target=self._audio_loop, daemon=True).start()
+
+    def _set_stt_status(self, status):
+        color = styles.SHARED["danger"] if "FAILED" in status else styles.SHARED["warning"]
+        self.lbl_stt.config(text=f"STT: {status}", fg=color)
+
     def _audio_loop(self):
-        print("DEBUG: Audio Loop Started")
+        log.debug("Audio Loop Started")
         while True:
             try:
                 text = self.recorder.text()
                 if text.strip():
-                    print(f"\n[USER]: {text}") 
+                    self.tracer.text_returned(text)
+                    log.info("[USER]: %s", text)
+                    self.journal.append("them", text)
+                    # History on arrival, not in the worker: a job dropped as stale still leaves its line,
+                    # and [THEM] lands in order with the [ME] lines from dual capture
+                    self.transcript_history.append(f"[THEM]: {text}")
                     self.gui_queue.put(("final", text))
-                    # --- THREADED AI CALL ---
-                    threading.Thread(target=self._run_ai, args=(text,), daemon=True).start()
-            except: time.sleep(0.1)
-
-    def _process_queue(self):
-        try:
-            while True:
-                msg, content = self.gui_queue.get_nowait()
-                if msg == "final": 
-                    self.txt_transcript.insert(tk.END, f"\n{content}")
-                    self.txt_transcript.see(tk.END)
-                elif msg == "ai": self._parse_ai(content)
-        except queue.Empty: pass
-        self.after(50, self._process_queue)
+                    # --- SPECULATIVE DRAFT HIT, OR SCHEDULED AI CALL (debounced, latest wins) ---
+                    if self.speculator.final(text):
+                        self.tracer.speculative()
+                        ai_log.debug("Committed speculative cue.")
+                    else:
+                        self._instant_cue(text)
+                        self.ai_scheduler.submit(text)
+            except Exception:
+                log.debug("Audio loop error", exc_info=True)
+                time.sleep(0.1)
+
+    def _instant_cue(self, text):
+        """Cached cue for this objection, else a stock answer the mission (or an earlier call) has: on screen now, before
+        the debounce; the LLM's cue follows and refreshes the cache."""
+        if not self.mission: return
+        cue = self.cue_cache.get(self.active_mission_name, self.cue_mode, self.stage.current, text)
+        if cue: ai_log.debug("Cached cue: %s", cue)
+        else:
+            hit = self.objection_index.match(text, self.stage.current, self.stage.upcoming) if self.objection_index else None
+            if not hit: return
+            ai_log.debug("Provisional cue (%s, %.2f): %s", hit.source, hit.score, hit.cue)
+            cue = hit.cue
+        self.gui_queue.put(("ai", f"[CUE]: ⚡ {cue}"))
+
+    def _poll_meters(self):
+        """Redraws only meters whose pixels or status changed since the last poll."""
+        px = lambda db: int(max(0.0, min(1.0, 1 + db / METER_RANGE_DB)) * METER_WIDTH)
+        for name, (frame, label, status_label, canvas, bar, floor, hold) in self.meter_widgets.items():
+            if not frame.winfo_ismapped(): continue
+            m = self.meters[name].snapshot()
+            drawn = (px(m["rms_db"]), px(m["floor_db"]), px(m["hold_db"]), m["status"])
+            if self._meter_drawn.get(name) == drawn: continue
+            level, floor_x, hold_x, status = drawn
+            previous = self._meter_drawn.get(name, (None, None, None, None))
+            self._meter_drawn[name] = drawn
+            canvas.coords(bar, 0, 0, level, 10)
+            canvas.coords(floor, floor_x, 0, floor_x, 10)
+            canvas.coords(hold, hold_x, 0, hold_x, 10)
+            if status != previous[3]:
+                status_label.config(text="" if status == "OK" else status)
+                canvas.itemconfig(bar, fill=styles.SHARED["danger"] if status == "CLIPPING" else styles.SHARED["success"])
+        self.after(METER_MS, self._poll_meters)
+
+    def _on_rep_utterance(self, text):
+        """The rep's own words from the second channel: history and journal as [ME], never an AI trigger."""
+        log.info("[ME]: %s", text)
+        self.journal.append("me", text)
+        self.transcript_history.append(f"[ME]: {text}")
+        self.stage.observe(text)  # the rep reading a stage's line is the surest sign of where the call is
+        self.gui_queue.put(("final_me", text))
+
+    def _handle_message(self, msg, content):
+        """Runs inside an UpdatePump frame; text goes through gui_queue.write so each panel gets one insert per frame."""
+        if msg == "final": self.gui_queue.write(self.txt_transcript, f"\n{content}")
+        elif msg == "final_me": self.gui_queue.write(self.txt_transcript, f"\n[ME] {content}")
+        elif msg == "ai": self._parse_ai(content)
+        elif msg == "cue_token": self._stream_cue(content)
+        elif msg == "cue_end": self._end_cue_stream()
+        elif msg == "db": self._on_db_result(*content)
+        elif msg == "stt_status": self._set_stt_status(content)
+        elif msg == "stt_ready": self.attach_recorder(content)
+        elif msg == "recovery": self.after_idle(self._offer_recovery, content)  # a modal dialog, so not inside the frame
+
+    def toggle_trace_overlay(self):
+        if self.lbl_trace.winfo_ismapped(): self.lbl_trace.pack_forget()
+        else: self.lbl_trace.pack(side="left", padx=10, after=self.lbl_stt)
+
+    def _show_trace(self, trace):
+        if self.lbl_trace.winfo_ismapped(): self.lbl_trace.config(text=self.tracer.overlay_text(trace))
 
     def toggle_mode(self):
         self.cue_mode = "SCRIPT" if self.cue_mode == "STRATEGY" else "STRATEGY"
         self.btn_mode.config(text=f"MODE: {self.cue_mode}")
 
     def load_mission(self, filename):
-        if os.path.exists(filename):
-            self.reset_session()
-            self.active_mission_name = filename.replace('mission_', '').replace('.txt', '').upper()
-            with open(filename, "r", encoding="utf-8") as f: self.mission_context = f.read()
-            self.lbl_status.config(text=f"ACTIVE: {self.active_mission_name}", fg=styles.SHARED["success"])
-            
-            if self.lead_data_context.strip():
-                opener = "[AI ANALYZING DOSSIER FOR CUSTOM OPENER... PRESS SPACE]"
-            else:
-                opener = "Select Mission... (Or add Context)"
-                if "sell_drones" in filename: opener = '"Hi, this is Josh from Kolasa Ag Systems..."'
-            
-            self._update_cue(opener)
-            self.transcript_history.append(f"[ME]: {opener}")
+        try: mission = missions.load(filename)
+        except missions.MissionError as e:
+            log.error("❌ MISSION NOT LOADED: %s", e)
+            self.lbl_status.config(text="MISSION INVALID", fg=styles.SHARED["danger"])
+            return
+        self.reset_session()
+        self.mission = mission
+        self.stage = missions.StageTracker(mission)
+        # Past calls and journals are read off the Tk thread; until it's built there's just no provisional cue
+        if MATCH_OBJECTIONS: threading.Thread(target=self._build_objection_index, args=(mission,), daemon=True, name="objection-index").start()
+        self.active_mission_name = mission.name
+        self.lbl_status.config(text=f"ACTIVE: {self.active_mission_name}", fg=styles.SHARED["success"])
+        
+        if self.lead_data_context.strip():
+            opener = "[AI ANALYZING DOSSIER FOR CUSTOM OPENER... PRESS SPACE]"
+        else:
+            opener = mission.opener() or "Select Mission... (Or add Context)"
+        
+        self.journal.start(self.active_mission_name)
+        self._update_cue(opener)
+        self.transcript_history.append(f"[ME]: {opener}")
+
+    def _build_objection_index(self, mission):
+        index = objections.build_index(mission, self.cue_cache)
+        if self.mission is not mission: return  # another mission was loaded meanwhile
+        self.objection_index = index
+        log.debug("Objection index for %s: %d entries", mission.name, len(index.entries))
 
     def open_context_dialog(self):
         ContextDialog(self, self.lead_data_context, self.save_context_data)
@@ -340,103 +536,254 @@ class ModernHUD(tk.Tk):
             self.btn_context.config(fg="white", text="CONTEXT 📝")
 
     def reset_session(self):
-        self.transcript_history = []
-        self.unique_notes = set()
-        self.mission_context = "NO MISSION SELECTED"
+        self.transcript_history.clear()
+        self.unique_notes = NoteStore()
+        self.mission = None
+        self.stage = missions.StageTracker()
+        self.objection_index = None
         self.cue_mode = "SCRIPT"
         self.btn_mode.config(text=f"MODE: {self.cue_mode}")
+        for widget in (self.txt_transcript, self.txt_cue, self.txt_notepad): self.gui_queue.discard(widget)
         self.txt_transcript.delete(1.0, tk.END)
         self.txt_cue.delete(1.0, tk.END); self.txt_cue.insert("1.0", "Select a Mission to start...\n")
         self.txt_notepad.delete("1.0", tk.END); self.txt_notepad.insert("1.0", "• Notes will appear here...\n")
         self.lead_data_context = ""
         self.btn_context.config(fg="white", text="CONTEXT 📝")
+        self.journal.close()
+
+    def _scan_journals(self):
+        records = journal.recover_unsaved()
+        if records: self.gui_queue.put(("recovery", records))
+
+    def _offer_recovery(self, records):
+        records = [r for r in records if r["path"] != self.journal.path]
+        if not records: return
+        *older, last = records
+        for record in older:
+            log.warning("⚠️ UNSAVED CALL LEFT ON DISK: %s", record["path"])
+            journal.dismiss(record)
+        msg = f"An unsaved call ({last['mission']}, {len(last['utterances'])} lines) was found from a previous session.\n\nRestore it?"
+        if not messagebox.askyesno("Recover Call", msg):
+            journal.dismiss(last)
+            return
+        mission_file = missions.find(last["mission"])
+        if mission_file: self.load_mission(mission_file)
+        self.journal.resume(last)
+        for speaker, text in last["lines"]:
+            self.txt_transcript.insert(tk.END, f"\n[ME] {text}" if speaker == "me" else f"\n{text}")
+            self.transcript_history.append(f"[{speaker.upper()}]: {text}")
+        self.txt_transcript.see(tk.END)
+        for note in last["notes"]:
+            self.unique_notes.add(note)
+            self.txt_notepad.insert(tk.END, f"• {note}\n")
+        log.info("✅ RECOVERED: %s", last["path"])
 
     def open_save_dialog(self):
-        transcript = self.txt_transcript.get("1.0", tk.END).strip()
+        transcript = self.journal.transcript()
         if not transcript:
             messagebox.showinfo("Empty", "Nothing to save yet.")
             return
-        found_email = ""
-        found_name = ""
-        for note in self.unique_notes:
-            if "email:" in note.lower(): found_email = note.split(":", 1)[1].strip()
-            if "name:" in note.lower() and "mission" not in note.lower(): found_name = note.split(":", 1)[1].strip()
-        SaveLeadDialog(self, found_name, found_email, self.perform_db_save)
+        SaveLeadDialog(self, self.unique_notes.fields["name"], self.unique_notes.fields["email"], self.perform_db_save)
 
     def perform_db_save(self, name, email, status):
-        transcript = self.txt_transcript.get("1.0", tk.END).strip()
-        success, msg = backend.save_call_to_neon(self.active_mission_name, transcript, self.unique_notes, email, name, status)
-        if success:
+        transcript = self.journal.transcript()
+        db_url, error = backend.ensure_database_url()
+        if not db_url:
+            messagebox.showerror("Database Error", error)
+            return
+        # Spooled locally and written by the background writer - the HUD never waits on Neon
+        self.db_writer.submit(self.active_mission_name, transcript, self.unique_notes, email, name, status)
+        self.journal.mark_saved()
+        self.lbl_status.config(text=f"SAVING: {name}...", fg=styles.SHARED["warning"])
+
+    def _on_db_result(self, ok, name, msg):
+        if ok:
             self.lbl_status.config(text=f"SAVED: {name}", fg=styles.SHARED["success"])
-            print(f"✅ DB SUCCESS: Saved lead '{name}' as '{status}'")
+            log.info("✅ DB SUCCESS: Saved lead '%s'", name)
             self.after(3000, lambda: self.lbl_status.config(text=f"ACTIVE: {self.active_mission_name}"))
+        elif ok is None:
+            self.lbl_status.config(text=f"OFFLINE: {name} spooled, will retry", fg=styles.SHARED["warning"])
         else: messagebox.showerror("Database Error", msg)
 
-    def on_close(self): self.destroy()
+    def on_close(self):
+        log.info("AI scheduler: %s", self.ai_scheduler.summary())
+        log.info("Prompt cache: %s", self.prompt_builder.summary())
+        log.info("Cue cache: %s", self.cue_cache.summary())
+        log.info("Speculation: %s", self.speculator.summary())
+        if self.objection_index: log.info("Objection matcher: %s", self.objection_index.summary())
+        log.info("Latency: %s", self.tracer.summary())
+        if hasattr(self.recorder, "summary"): log.info("Capture: %s", self.recorder.summary())
+        self.tracer.close()
+        self.db_writer.close()
+        self.journal.close()
+        for panel in (self.txt_transcript, self.txt_cue, self.txt_notepad):
+            if panel.archive: panel.archive.close()
+        log.info("GUI pump: %s", self.gui_queue.summary())
+        log.info("Theme: %s", self.theme.summary())
+        self.destroy()
 
-    def force_ai_update(self, event): threading.Thread(target=self._run_ai, args=("USER REQUESTS ADVICE",), daemon=True).start()
+    def force_ai_update(self, event): self.ai_scheduler.flush_now(FORCE_INPUT)
 
     def _update_cue(self, text):
-        self.txt_cue.insert(tk.END, f"\n[{datetime.now().strftime('%H:%M:%S')}] ", "dim")
-        self.txt_cue.insert(tk.END, f"{text}\n")
-        self.txt_cue.see(tk.END)
-
-    def _run_ai(self, text):
+        self.gui_queue.write(self.txt_cue, f"\n[{datetime.now().strftime('%H:%M:%S')}] ", "dim")
+        self.gui_queue.write(self.txt_cue, f"{text}\n")
+        self.journal.append("cue", text)
+        self.tracer.rendered()
+
+    def _stream_cue(self, token):
+        if not self._cue_streaming:
+            self.gui_queue.write(self.txt_cue, f"\n[{datetime.now().strftime('%H:%M:%S')}] ", "dim")
+            self._cue_streaming = True
+        self.gui_queue.write(self.txt_cue, token)
+        self._cue_stream_text.append(token)
+
+    def _end_cue_stream(self):
+        if self._cue_streaming:
+            self.gui_queue.write(self.txt_cue, "\n")
+            self.journal.append("cue", "".join(self._cue_stream_text))
+            self.tracer.rendered()
+        self._cue_streaming = False
+        self._cue_stream_text = []
+
+    def _run_ai(self, text, job=None):
         if not self.client: return
-        print(f"DEBUG: AI Called for input: '{text}'") 
+        out = job.emit if job else self.gui_queue.put
+        speculative = job is not None and job.speculative
+        ai_log.debug("AI Called for input: '%s'", text)
 
-        if self.mission_context == "NO MISSION SELECTED":
-            print("⚠️ IGNORED: No Mission Selected.")
-            self.gui_queue.put(("ai", "[CUE]: PLEASE SELECT A MISSION FROM THE MENU."))
+        if not self.mission:
+            ai_log.warning("⚠️ IGNORED: No Mission Selected.")
+            out(("ai", "[CUE]: PLEASE SELECT A MISSION FROM THE MENU."))
             return
 
-        self.gui_queue.put(("ai", "[ANALYZING...]"))
-        self.transcript_history.append(f"[THEM]: {text}")
-        if len(self.transcript_history) > HISTORY_SIZE: self.transcript_history.pop(0)
+        out(("ai", "[ANALYZING...]"))
+        # Finals are already in the history (_audio_loop); a draft's partial text only goes in its own prompt
+        if text == FORCE_INPUT: self.transcript_history.append(f"[THEM]: {text}")
+
+        # --- CACHED CUE WAS SHOWN BY _instant_cue; THIS CALL REFRESHES IT ---
+        stage = self.stage.current
+        cacheable = text != FORCE_INPUT and not speculative
 
         # INJECT CONTEXT
         lead_data = self.lead_data_context if self.lead_data_context else "No prior context provided."
         
-        # --- FIXED NAMESPACE REFERENCES HERE ---
-        sys_msg = f"{backend.PROMPT_SCRIPT if self.cue_mode == 'SCRIPT' else backend.PROMPT_STRATEGY}\n{backend.BASE_SYSTEM_PROMPT.format(mission=self.mission_context, lead_data=lead_data, history=chr(10).join(self.transcript_history), text=text)}"
+        # --- STABLE PREFIX + APPEND-ONLY HISTORY (current input is the last line) ---
+        # --- STAGE-SCOPED MISSION (header + current/next stage; changes only when the stage does) ---
+        system = self.prompt_builder.system_prompt(self.cue_mode, self.mission.prompt(stage), lead_data)
+        history = self.transcript_history.lines(reserved_text=system)
+        if speculative: history.append(f"[THEM]: {text}")
+        messages = self.prompt_builder.build(system, history)
         
         try:
-            resp = self.client.chat.completions.create(model="gpt-4o", messages=[{"role": "system", "content": sys_msg}], temperature=0.6)
-            content = resp.choices[0].message.content.strip()
-            print(f"[AI]: {content}\n")
-            self.gui_queue.put(("ai", content))
+            self.tracer.request_sent(job)
+            if STREAM_CUES: cue = self._run_ai_stream(text, messages, job)
+            else:
+                resp = self.client.chat.completions.create(model="gpt-4o", messages=messages, temperature=0.6)
+                self.tracer.mark("first_token", job)
+                self.tracer.mark("final_token", job)
+                self._report_prefix_reuse(resp.usage)
+                content = resp.choices[0].message.content.strip()
+                if job and job.stale:
+                    job.abandoned = True
+                    ai_log.debug("Dropped stale AI response.")
+                    return
+                ai_log.debug("[AI]: %s", content)
+                out(("ai", content))
+                cue = content.split("[CUE]:")[1].split("|")[0].strip().strip('"') if "[CUE]:" in content else None
+            if cue:
+                if cacheable: self.cue_cache.put(self.active_mission_name, self.cue_mode, stage, text, cue)
+                # A draft's cue moves the stage only once it's committed (SpeculativeDraft.finish)
+                if speculative: job.finish(cue)
+                else: self.stage.observe(cue)
         except Exception as e: 
-            print(f"AI ERROR: {e}")
-            self.gui_queue.put(("ai", f"ERROR: {e}"))
+            out(("cue_end", None))
+            if job and job.stale:  # its stream was closed under it (superseded draft)
+                job.abandoned = True
+                ai_log.debug("Closed stale AI stream.")
+                return
+            ai_log.error("AI ERROR: %s", e)
+            out(("ai", f"ERROR: {e}"))
+
+    def _report_prefix_reuse(self, usage):
+        cached = self.prompt_builder.record_usage(usage)
+        provider = f", {cached}/{usage.prompt_tokens} tokens cached" if usage else ""
+        ai_log.debug("Prompt prefix reuse %.0f%%%s", self.prompt_builder.last_reuse * 100, provider)
+
+    def _run_ai_stream(self, text, messages, job=None):
+        out = job.emit if job else self.gui_queue.put
+        parser = backend.CueStreamParser()
+        content = []
+        cue = []
+        started = time.perf_counter()
+        first_cue = None
+
+        def emit(events):
+            nonlocal first_cue
+            for kind, value in events:
+                if kind == "note": out(("ai", f"[NOTE]: {value}"))
+                elif kind == "cue":
+                    if first_cue is None: first_cue = time.perf_counter() - started
+                    cue.append(value)
+                    out(("cue_token", value))
+
+        usage = None
+        stream = self.client.chat.completions.create(model="gpt-4o", messages=messages, temperature=0.6, stream=True, stream_options={"include_usage": True})
+        if job: job.attach(stream)
+        for chunk in stream:
+            if job and job.stale:
+                job.abandoned = True
+                stream.close()
+                out(("cue_end", None))
+                ai_log.debug("Cancelled stale AI stream.")
+                return None
+            if chunk.usage: usage = chunk.usage
+            if not chunk.choices: continue
+            delta = chunk.choices[0].delta.content or ""
+            if delta: self.tracer.mark("first_token", job)
+            content.append(delta)
+            emit(parser.feed(delta))
+        emit(parser.close())
+        self.tracer.mark("final_token", job)
+        out(("cue_end", None))
+
+        total = time.perf_counter() - started
+        ttfc = f"{first_cue:.2f}s" if first_cue is not None else "n/a"
+        ai_log.debug("[AI]: %s", "".join(content).strip())
+        ai_log.debug("First cue word %s / full response %.2fs", ttfc, total)
+        self._report_prefix_reuse(usage)
+        return "".join(cue).strip()
 
     def _parse_ai(self, text):
         if "[NOTE]:" in text:
             raw = text.split("[NOTE]:")[1].split("[CUE]")[0].strip()
             for line in raw.split('\n'):
-                clean = re.sub(r'\W+', '', line).lower()
-                if line and not any(re.sub(r'\W+', '', x).lower() == clean for x in self.unique_notes):
-                    self.unique_notes.add(line)
+                line = line.strip()
+                if line and self.unique_notes.add(line):
+                    self.journal.append("note", line)
                     if ":" in line:
                         k, v = line.split(":", 1)
-                        self.txt_notepad.insert(tk.END, "• "); self.txt_notepad.insert(tk.END, f"{k}:", "key_bold"); self.txt_notepad.insert(tk.END, f"{v}\n")
-                    else: self.txt_notepad.insert(tk.END, f"• {line}\n")
-                    self.txt_notepad.see(tk.END)
+                        self.gui_queue.write(self.txt_notepad, "• "); self.gui_queue.write(self.txt_notepad, f"{k}:", "key_bold"); self.gui_queue.write(self.txt_notepad, f"{v}\n")
+                    else: self.gui_queue.write(self.txt_notepad, f"• {line}\n")
         if "[CUE]:" in text:
             self._update_cue(text.split("[CUE]:")[1].split("|")[0].strip().strip('"'))
 
 if __name__ == "__main__":
     try:
-        if backend.ensure_api_key():
-            mic_idx = backend.get_smart_mic_index()
-            # FORCE int8 to avoid memory crash on Windows CPU
-            recorder = AudioToTextRecorder(
-                model="tiny", 
-                language="en", 
-                spinner=False, 
-                enable_realtime_transcription=True, 
-                input_device_index=mic_idx,
-                compute_type="int8"
-            )
-            print("✅ AUDIO ENGINE READY.")
-            ModernHUD(recorder).mainloop()
-    except Exception as e: print(f"CRITICAL ERROR: {e}")
+        applog.setup()
+        timer = startup.StartupTimer()
+        with timer.phase("api_key"): ok = backend.ensure_api_key()
+        if ok:
+            # Window first, STT engine in the background (see startup.py)
+            with timer.phase("ui"): hud = ModernHUD()
+            hud.after_idle(lambda: timer.mark("window_shown"))
+            if os.getenv("KLIX_EXIT_AFTER_WINDOW"):  # cold-start run from bench_startup.py
+                hud.after_idle(lambda: (print(f"STARTUP: {timer.report()}"), hud.destroy()))
+                hud.mainloop()
+                raise SystemExit
+            threading.Thread(target=startup.load_engine, args=(
+                timer,
+                lambda status: hud.gui_queue.put(("stt_status", status)),
+                lambda recorder: hud.gui_queue.put(("stt_ready", recorder)),
+            ), daemon=True).start()
+            hud.mainloop()
+    except Exception as e: log.critical("CRITICAL ERROR: %s", e, exc_info=True)
@@ -0,0 +1,130 @@
+import atexit
+import gzip
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import shutil
+import sys
+import threading
+import time
+from datetime import datetime
+
+# --- APP LOGGING ---
+# Hot threads (audio loop, AI workers, RealtimeSTT) only put records on an in-memory queue;
+# one listener thread formats them and does all disk I/O. The file is compact JSONL
+# (one object per line), rolled over at ROTATE_BYTES or at midnight, whichever comes first,
+# and rolled files are gzipped on the listener thread. Chatty engine lines are sampled
+# before they're queued, so they cost almost nothing on the thread that logs them.
+#
+#   log = applog.get("ai")    ->  logger "klix.ai"
+#   log.debug("First cue word %.2fs", ttfc)
+
+LOG_DIR = "logs"
+LOG_FILE = os.path.join(LOG_DIR, "klix.jsonl")
+ROTATE_BYTES = 10 * 1024 * 1024
+BACKUP_COUNT = 20
+CONSOLE_LEVEL = os.getenv("LOG_CONSOLE_LEVEL", "INFO").upper()
+SAMPLE_EVERY = {  # message prefix -> keep 1 in N
+    "Setting listen time": 50,
+    "Current realtime buffer size": 50,
+    "Receive from parent_transcription_pipe": 20,
+    "Realtime text detected": 5,
+}
+
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).strftime("%Y-%m-%d %H:%M:%S.") + f"{int(record.msecs):03d}",
+            "lvl": record.levelname,
+            "log": record.name,
+            "thr": record.threadName,
+            "msg": record.getMessage(),
+        }
+        if record.exc_info: entry["exc"] = self.formatException(record.exc_info)
+        if getattr(record, "sampled", 1) > 1: entry["1_in"] = record.sampled
+        return json.dumps(entry, ensure_ascii=False, separators=(",", ":"))
+
+
+class SampleFilter(logging.Filter):
+    """Keeps 1 in N of the high-frequency debug lines in SAMPLE_EVERY; everything else passes."""
+    def __init__(self, rules=SAMPLE_EVERY):
+        super().__init__()
+        self.rules = rules
+        self.counts = dict.fromkeys(rules, 0)
+        self.lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno > logging.INFO: return True
+        msg = record.msg if isinstance(record.msg, str) else ""
+        for prefix, every in self.rules.items():
+            if msg.startswith(prefix):
+                with self.lock:
+                    self.counts[prefix] += 1
+                    keep = self.counts[prefix] % every == 1 or every == 1
+                if keep: record.sampled = every
+                return keep
+        return True
+
+
+class CompressedRotatingHandler(logging.handlers.RotatingFileHandler):
+    """Size rotation plus a daily rollover; rolled files are gzipped."""
+    def __init__(self, path, max_bytes=ROTATE_BYTES, backup_count=BACKUP_COUNT):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        super().__init__(path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8", delay=True)
+        self.namer = lambda name: name + ".gz"
+        self.rotator = self._gzip
+        self.day = time.strftime("%Y-%m-%d")
+
+    def shouldRollover(self, record):
+        if time.strftime("%Y-%m-%d") != self.day:
+            self.day = time.strftime("%Y-%m-%d")
+            return os.path.exists(self.baseFilename) and os.path.getsize(self.baseFilename) > 0
+        return super().shouldRollover(record)
+
+    @staticmethod
+    def _gzip(source, dest):
+        with open(source, "rb") as src, gzip.open(dest, "wb", compresslevel=6) as out: shutil.copyfileobj(src, out)
+        os.remove(source)
+
+
+def setup(path=LOG_FILE, console_level=CONSOLE_LEVEL):
+    """Call once at startup. Routes klix.* and RealtimeSTT's logger through the queue."""
+    global _listener
+    if _listener: return
+    log_queue = queue.SimpleQueue()  # unbounded: put() never blocks the caller
+
+    file_handler = CompressedRotatingHandler(path)
+    file_handler.setFormatter(JsonFormatter())
+    console = logging.StreamHandler(sys.stdout)
+    console.setLevel(console_level)
+    console.setFormatter(logging.Formatter("%(message)s"))
+    console.addFilter(lambda r: r.name.startswith("klix") or r.levelno >= logging.WARNING)  # engine chatter stays in the file
+    _listener = logging.handlers.QueueListener(log_queue, file_handler, console, respect_handler_level=True)
+    _listener.start()
+
+    handler = logging.handlers.QueueHandler(log_queue)
+    handler.addFilter(SampleFilter())
+    for name in ("klix", "realtimestt"):
+        logger = logging.getLogger(name)
+        logger.setLevel(logging.DEBUG)
+        logger.addHandler(handler)
+        logger.propagate = False
+    atexit.register(shutdown)
+
+
+def get(name):
+    return logging.getLogger(f"klix.{name}")
+
+
+def shutdown():
+    """Drains the queue to disk. Safe to call more than once."""
+    global _listener
+    if _listener:
+        _listener.stop()
+        for handler in _listener.handlers: handler.close()
+    _listener = None
@@ -1,8 +1,16 @@
 ﻿import os
-import pyaudio
-import psycopg2
+import re
+import io
+import csv
 import tkinter as tk
 from tkinter import simpledialog
+from notes import NoteStore
+from lazy import lazy
+import applog
+import devices
+
+psycopg2 = lazy("psycopg2")
+log = applog.get("backend")
 
 # --- SYSTEM PROMPTS (THE BLENDER) ---
 
@@ -32,20 +40,151 @@ PROMPT_SCRIPT = (
     "2. [CUE]: \"Exact words to say.\""
 )
 
-# Base Prompt injects the data
+# SUMMARY MODE: Folds old turns into running call memory (runs in the background)
+PROMPT_SUMMARY = (
+    "You maintain the running memory of a live sales call.\n"
+    "Merge the PREVIOUS SUMMARY with the NEW LINES into one short summary.\n"
+    "KEEP EXACTLY: names, businesses, emails, phone numbers, prices, percentages, quantities, dates,\n"
+    "objections raised, anything either side agreed to, and which Stage of the mission was reached.\n"
+    "Drop small talk. Plain text, max 120 words."
+)
+
+def summarize_history(client, summary, lines):
+    """Background summarizer used by ConversationMemory. Uses a small model: this is off the hot path."""
+    resp = client.chat.completions.create(
+        model="gpt-4o-mini",
+        messages=[
+            {"role": "system", "content": PROMPT_SUMMARY},
+            {"role": "user", "content": f"PREVIOUS SUMMARY:\n{summary or '(none)'}\n\nNEW LINES:\n" + "\n".join(lines)},
+        ],
+        temperature=0.2,
+    )
+    return resp.choices[0].message.content
+
+# Base Prompt injects the data. Only things that stay fixed for the whole call live here,
+# so the system message is byte-identical turn after turn and the provider can cache it.
 BASE_SYSTEM_PROMPT = (
     "--- MISSION (THE GOAL) ---\n{mission}\n\n"
     "--- CONTEXT (THE TARGET) ---\n{lead_data}\n\n"
-    "--- CONVERSATION HISTORY ---\n{history}\n\n"
-    "--- CURRENT INPUT ---\n{text}"
+    "--- CONVERSATION HISTORY ---\n"
+    "The conversation follows as messages, one per line spoken, oldest first.\n"
+    "The LAST message is the CURRENT INPUT. Respond to it."
 )
 
+# --- PROMPT BUILDER ---
+class PromptBuilder:
+    """Builds [stable system prefix] + [append-only history] + [current input] message lists."""
+    def __init__(self):
+        self.last_messages = []
+        self.last_reuse = 0.0
+        self.stats = {"requests": 0, "reused_chars": 0, "total_chars": 0, "prompt_tokens": 0, "cached_tokens": 0}
+
+    def system_prompt(self, cue_mode, mission, lead_data):
+        role = PROMPT_SCRIPT if cue_mode == "SCRIPT" else PROMPT_STRATEGY
+        return f"{role}\n{BASE_SYSTEM_PROMPT.format(mission=mission, lead_data=lead_data)}"
+
+    def build(self, system, history):
+        """`history` is the list of "[ME]: ..." / "[THEM]: ..." lines, current input last."""
+        messages = [{"role": "system", "content": system}]
+        messages += [{"role": "user", "content": line} for line in history]
+        self._track(messages)
+        return messages
+
+    def _track(self, messages):
+        reused = 0
+        for old, new in zip(self.last_messages, messages):
+            if old != new: break
+            reused += len(new["content"])
+        total = sum(len(m["content"]) for m in messages)
+        self.last_messages = messages
+        self.last_reuse = reused / total if total else 0.0
+        self.stats["requests"] += 1
+        self.stats["reused_chars"] += reused
+        self.stats["total_chars"] += total
+
+    def record_usage(self, usage):
+        """Feeds back the provider's token usage so we see real cache hits, not just our estimate."""
+        if not usage: return None
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = (getattr(details, "cached_tokens", 0) or 0) if details else 0
+        self.stats["prompt_tokens"] += usage.prompt_tokens or 0
+        self.stats["cached_tokens"] += cached
+        return cached
+
+    def summary(self):
+        s = self.stats
+        local = s["reused_chars"] / s["total_chars"] if s["total_chars"] else 0.0
+        cached = s["cached_tokens"] / s["prompt_tokens"] if s["prompt_tokens"] else 0.0
+        return f"{s['requests']} requests, prefix reuse {local:.0%} (local), {cached:.0%} of prompt tokens cached (provider)"
+
+# --- STREAM PARSER ---
+class CueStreamParser:
+    """Splits a streamed completion into finished [NOTE] lines and live [CUE] text."""
+    def __init__(self):
+        self.buffer = ""
+        self.in_notes = False
+        self.in_cue = False
+        self.cue_started = False
+        self.cue_done = False
+        self.held = ""  # trailing quotes/whitespace we can't emit until we know the cue goes on
+
+    def feed(self, delta):
+        """Returns a list of ("note", line) / ("cue", text) events for this chunk."""
+        events = []
+        if not delta or self.cue_done: return events
+        if self.in_cue: return self._feed_cue(delta)
+
+        self.buffer += delta
+        if "[CUE]:" in self.buffer:
+            head, tail = self.buffer.split("[CUE]:", 1)
+            for line in head.split("\n"): events += self._note_line(line)
+            self.buffer = ""
+            self.in_cue = True
+            return events + self._feed_cue(tail)
+
+        while "\n" in self.buffer:
+            line, self.buffer = self.buffer.split("\n", 1)
+            events += self._note_line(line)
+        return events
+
+    def close(self):
+        """Flushes whatever is left once the stream ends."""
+        events = []
+        if not self.in_cue and self.buffer:
+            events += self._note_line(self.buffer)
+        self.buffer = ""
+        self.held = ""
+        self.cue_done = True
+        return events
+
+    def _note_line(self, line):
+        if "[NOTE]:" in line:
+            self.in_notes = True
+            line = line.split("[NOTE]:", 1)[1]
+        elif not self.in_notes: return []
+        line = re.sub(r'^\s*\d+\.\s*', '', line).strip()
+        return [("note", line)] if line else []
+
+    def _feed_cue(self, delta):
+        if not self.cue_started:
+            delta = delta.lstrip(' "\n')
+            if not delta: return []
+            self.cue_started = True
+        if "|" in delta:
+            delta = delta.split("|", 1)[0]
+            self.cue_done = True
+        text = self.held + delta
+        keep = len(text.rstrip(' "\n'))
+        if self.cue_done: keep_text, self.held = text[:keep], ""
+        else: keep_text, self.held = text[:keep], text[keep:]
+        return [("cue", keep_text)] if keep_text else []
+
 # --- PRE-FLIGHT CHECKS ---
 def ensure_api_key():
     """Checks for API key at startup."""
     key = os.getenv("OPENAI_API_KEY")
     if not key:
-        print("⚠️ API KEY MISSING: Launching Setup Wizard...")
+        log.warning("⚠️ API KEY MISSING: Launching Setup Wizard...")
         root = tk.Tk()
         root.withdraw()
         user_input = simpledialog.askstring("KlixOS Setup", "OpenAI API Key is missing.\n\nPlease paste it here:")
@@ -55,33 +194,26 @@ def ensure_api_key():
             with open(".env", "a") as f:
                 f.write(f"\nOPENAI_API_KEY={user_input.strip()}")
             os.environ["OPENAI_API_KEY"] = user_input.strip()
-            print("✅ SUCCESS: API Key saved.")
+            log.info("✅ SUCCESS: API Key saved.")
             return True
         else:
-            print("❌ SETUP CANCELLED.")
+            log.error("❌ SETUP CANCELLED.")
             return False
     return True
 
-def get_smart_mic_index():
-    target_name = os.getenv("MIC_NAME", "Voicemeeter") 
-    p = pyaudio.PyAudio()
-    
-    print(f"DEBUG: Searching for microphone matching '{target_name}'...")
-    candidates = []
-    
-    for i in range(p.get_device_count()):
-        try:
-            info = p.get_device_info_by_index(i)
-            if info['maxInputChannels'] > 0:
-                name = info['name']
-                if target_name.lower() in name.lower():
-                    candidates.append((i, name))
-        except: pass
-    p.terminate()
+def list_input_devices():
+    """[(index, name, max_input_channels, default_sample_rate)] for every input device."""
+    return devices.list_inputs()
+
+def pick_mic(device_list, target_name=None):
+    """Returns (index, name) of the best input matching MIC_NAME, or (1, None) if none does."""
+    target_name = target_name or os.getenv("MIC_NAME", "Voicemeeter")
+    log.debug("Searching for microphone matching '%s'...", target_name)
+    candidates = [(i, name) for i, name, _, _ in device_list if target_name.lower() in name.lower()]
 
     if not candidates:
-        print("⚠️ No matching mic found. Using default index 1.")
-        return 1
+        log.warning("⚠️ No matching mic found. Using default index 1.")
+        return 1, None
 
     best_index = candidates[0][0]
     best_name = candidates[0][1]
@@ -95,55 +227,157 @@ def get_smart_mic_index():
             best_index = idx
             best_name = name
     
-    print(f"✅ AUTO-DETECT: Selected '{best_name}' at Index {best_index}")
-    return best_index
+    log.info("✅ AUTO-DETECT: Selected '%s' at Index %s", best_name, best_index)
+    return best_index, best_name
 
 # --- DATABASE ENGINE ---
-def save_call_to_neon(mission, transcript, notes, client_email, client_name, status):
+def ensure_database_url():
+    """Returns (db_url, error). Prompts for the URL once if it's missing, so call it from the Tk thread."""
     db_url = os.getenv("DATABASE_URL")
-    
-    if not db_url:
-        root = tk.Tk()
-        root.withdraw()
-        user_input = simpledialog.askstring("Database Setup", "Database URL is missing.\n\nPaste your NeonDB Connection String here:")
-        root.destroy()
-        if user_input and "postgres" in user_input:
-            try:
-                with open(".env", "a") as f: f.write(f"\nDATABASE_URL={user_input.strip()}")
-                os.environ["DATABASE_URL"] = user_input.strip()
-                db_url = user_input.strip()
-            except Exception as e: return False, f"Could not save .env: {str(e)}"
-        else: return False, "No Database URL provided."
+    if db_url: return db_url, None
+
+    root = tk.Tk()
+    root.withdraw()
+    user_input = simpledialog.askstring("Database Setup", "Database URL is missing.\n\nPaste your NeonDB Connection String here:")
+    root.destroy()
+    if user_input and "postgres" in user_input:
+        try:
+            with open(".env", "a") as f: f.write(f"\nDATABASE_URL={user_input.strip()}")
+            os.environ["DATABASE_URL"] = user_input.strip()
+            return user_input.strip(), None
+        except Exception as e: return None, f"Could not save .env: {str(e)}"
+    return None, "No Database URL provided."
+
+# leads.email must be unique for ON CONFLICT; NULL emails (anonymous callers) never collide
+SCHEMA_UPGRADE = "CREATE UNIQUE INDEX IF NOT EXISTS leads_email_key ON leads (email)"
+
+# Databases from before the index can hold the same email twice, and CREATE UNIQUE INDEX
+# fails on them. Each email keeps its oldest lead, taking the newest status and the newest
+# real name; the others' calls move over to it and the duplicates are deleted.
+MERGE_DUPLICATE_LEADS_SQL = [
+    """CREATE TEMP TABLE lead_dupes ON COMMIT DROP AS
+       SELECT id, MIN(id) OVER (PARTITION BY email) AS keep_id,
+              ROW_NUMBER() OVER (PARTITION BY email ORDER BY COALESCE(updated_at, created_at) DESC, id DESC) AS newest
+       FROM leads WHERE email IS NOT NULL""",
+    "DELETE FROM lead_dupes WHERE keep_id IN (SELECT keep_id FROM lead_dupes GROUP BY keep_id HAVING COUNT(*) = 1)",
+    """UPDATE leads l SET status = n.status, updated_at = NOW()
+       FROM lead_dupes d JOIN leads n ON n.id = d.id
+       WHERE l.id = d.keep_id AND d.newest = 1 AND d.id <> d.keep_id""",
+    """UPDATE leads l SET name = n.name
+       FROM (SELECT DISTINCT ON (d.keep_id) d.keep_id, x.name FROM lead_dupes d JOIN leads x ON x.id = d.id
+             WHERE x.name IS NOT NULL AND x.name <> 'Unknown Lead' ORDER BY d.keep_id, d.newest) n
+       WHERE l.id = n.keep_id""",
+    "UPDATE calls c SET lead_id = d.keep_id FROM lead_dupes d WHERE c.lead_id = d.id AND d.id <> d.keep_id",
+    "DELETE FROM leads l USING lead_dupes d WHERE l.id = d.id AND d.id <> d.keep_id",
+]
+
+# Lead upsert + call insert in ONE statement: one round trip, and two reps saving the same
+# email at once can't create duplicate leads (ON CONFLICT is atomic, SELECT-then-INSERT isn't)
+UPSERT_CALL_SQL = """
+    WITH lead AS (
+        INSERT INTO leads (name, email, status, created_at) VALUES (%s, %s, %s, NOW())
+        ON CONFLICT (email) DO UPDATE SET name = COALESCE(NULLIF(EXCLUDED.name, 'Unknown Lead'), leads.name),
+            status = EXCLUDED.status, updated_at = NOW()
+        RETURNING id
+    )
+    INSERT INTO calls (lead_id, mission_name, transcript, ai_summary, call_date)
+    SELECT id, %s, %s, %s, NOW() FROM lead
+"""
+
+def ensure_schema(conn):
+    """Merges duplicate leads and adds the email index, once. Returns how many duplicates were merged."""
+    cur = conn.cursor()
+    cur.execute("SELECT to_regclass('leads_email_key')")
+    if cur.fetchone()[0]:
+        conn.rollback()
+        cur.close()
+        return 0
+    # No inserts between the merge and the index, or a new duplicate could slip in
+    cur.execute("LOCK TABLE leads IN SHARE ROW EXCLUSIVE MODE")
+    for sql in MERGE_DUPLICATE_LEADS_SQL: cur.execute(sql)
+    merged = cur.rowcount
+    cur.execute(SCHEMA_UPGRADE)
+    conn.commit()
+    cur.close()
+    return merged
+
+def write_call(conn, mission, transcript, notes, client_email, client_name, status):
+    """Upserts the lead and inserts the call in a single statement, then commits."""
+    client_email = (client_email or "").strip() or None
+    if client_email: name = client_name or "Unknown Lead"
+    else: name = "Anonymous Caller"
+    cur = conn.cursor()
+    cur.execute(UPSERT_CALL_SQL, (name, client_email, status, mission, transcript, "\n".join(notes)))
+    conn.commit()
+    cur.close()
+
+# --- BULK IMPORT (logs/call_*.txt) ---
+def parse_call_log(path):
+    """Reads one archived call log into the same fields write_call takes."""
+    with open(path, "r", encoding="utf-8-sig") as f: lines = f.read().splitlines()
+    call = {"mission": "UNKNOWN", "call_date": None, "notes": [], "transcript": "", "client_email": None, "client_name": None}
+    notes = NoteStore()
+    body_start = 0
+    for i, line in enumerate(lines):
+        if line.startswith("MISSION:"): call["mission"] = line.split(":", 1)[1].strip()
+        elif line.startswith("DATE:"): call["call_date"] = line.split(":", 1)[1].strip()
+        elif line.startswith("[ME]:") or line.startswith("[THEM]:"):
+            body_start = i
+            break
+        elif line.startswith("• ") and "Notes will appear here" not in line: notes.add(line[2:])
+    call["transcript"] = "\n".join(lines[body_start:]).strip()
+    call["notes"] = list(notes)
+    call["client_email"] = notes.fields["email"] or None
+    call["client_name"] = notes.fields["name"] or None
+    return call
+
+def bulk_import_calls(conn, calls):
+    """Loads many calls in one transaction: COPY into a temp table, then set-based upserts.
+    Calls already in `calls` (same mission + call_date) are skipped, so re-running is safe."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for seq, c in enumerate(calls):
+        email = (c["client_email"] or "").strip() or None
+        name = (c["client_name"] or "Unknown Lead") if email else "Anonymous Caller"
+        writer.writerow([seq, name, email, c.get("status") or "IMPORTED", c["mission"], c["transcript"], "\n".join(c["notes"]), c["call_date"]])
+    buf.seek(0)
+
+    cur = conn.cursor()
+    cur.execute("""
+        CREATE TEMP TABLE import_calls (
+            seq INT, name TEXT, email TEXT, status TEXT, mission TEXT, transcript TEXT,
+            ai_summary TEXT, call_date TIMESTAMP, lead_id INT) ON COMMIT DROP
+    """)
+    cur.copy_expert("COPY import_calls (seq, name, email, status, mission, transcript, ai_summary, call_date) FROM STDIN WITH (FORMAT csv)", buf)
+    cur.execute("DELETE FROM import_calls i USING calls c WHERE c.mission_name = i.mission AND c.call_date = i.call_date")
+    # Backfill never overwrites a lead the HUD has already saved
+    cur.execute("""
+        INSERT INTO leads (name, email, status, created_at)
+        SELECT DISTINCT ON (email) name, email, status, call_date FROM import_calls
+        WHERE email IS NOT NULL ORDER BY email, call_date DESC
+        ON CONFLICT (email) DO NOTHING
+    """)
+    cur.execute("UPDATE import_calls i SET lead_id = l.id FROM leads l WHERE i.email = l.email")
+    # One anonymous lead per call: take ids from the sequence so each row knows its lead
+    cur.execute("UPDATE import_calls SET lead_id = nextval(pg_get_serial_sequence('leads', 'id')) WHERE email IS NULL")
+    cur.execute("INSERT INTO leads (id, name, status, created_at) SELECT lead_id, name, status, call_date FROM import_calls WHERE email IS NULL")
+    cur.execute("""
+        INSERT INTO calls (lead_id, mission_name, transcript, ai_summary, call_date)
+        SELECT lead_id, mission, transcript, ai_summary, call_date FROM import_calls ORDER BY seq
+    """)
+    imported = cur.rowcount
+    conn.commit()
+    cur.close()
+    return imported
+
+def save_call_to_neon(mission, transcript, notes, client_email, client_name, status):
+    """One-shot save on a fresh connection. The HUD uses db_writer.DBWriter instead."""
+    db_url, error = ensure_database_url()
+    if not db_url: return False, error
 
     try:
         conn = psycopg2.connect(db_url)
-        cur = conn.cursor()
-        
-        lead_id = None
-        if client_email:
-            cur.execute("SELECT id FROM leads WHERE email = %s", (client_email,))
-            res = cur.fetchone()
-            if res:
-                lead_id = res[0]
-                cur.execute("UPDATE leads SET name = %s, status = %s, updated_at = NOW() WHERE id = %s", (client_name, status, lead_id))
-            else:
-                cur.execute(
-                    "INSERT INTO leads (name, email, status, created_at) VALUES (%s, %s, %s, NOW()) RETURNING id",
-                    (client_name or "Unknown Lead", client_email, status)
-                )
-                lead_id = cur.fetchone()[0]
-        else:
-            cur.execute("INSERT INTO leads (name, status, created_at) VALUES ('Anonymous Caller', %s, NOW()) RETURNING id", (status,))
-            lead_id = cur.fetchone()[0]
-
-        ai_summary = "\n".join(notes)
-        cur.execute("""
-            INSERT INTO calls (lead_id, mission_name, transcript, ai_summary, call_date)
-            VALUES (%s, %s, %s, %s, NOW())
-        """, (lead_id, mission, transcript, ai_summary))
-        
-        conn.commit()
-        cur.close()
+        write_call(conn, mission, transcript, notes, client_email, client_name, status)
         conn.close()
         return True, "Saved"
     except Exception as e:
@@ -0,0 +1,51 @@
+import math
+import struct
+import sys
+import timeit
+import numpy as np
+from metering import levels, Meter
+
+# --- METERING MICROBENCHMARK ---
+# Usage: python bench_metering.py [buffers]
+# Per-buffer cost of the old level code (sound_test.py's struct.unpack + Python sum of squares,
+# mic_check.py / find_mic.py's max() over raw bytes) against metering.levels / Meter.update,
+# on 1024-sample 16-bit buffers like the scripts read.
+
+SAMPLES = 1024
+
+
+def old_rms(data):
+    shorts = struct.unpack(f"{len(data)//2}h", data)
+    return math.sqrt(sum(s * s for s in shorts) / len(shorts))
+
+
+def old_peak(data): return max(data)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    rng = np.random.default_rng(0)
+    buffers = [rng.normal(0, 4000, SAMPLES).clip(-32768, 32767).astype(np.int16).tobytes() for _ in range(64)]
+    meter = Meter()
+    cases = [
+        ("old RMS (struct + sum)", lambda b: old_rms(b)),
+        ("old peak (max of bytes)", lambda b: old_peak(b)),
+        ("levels() rms+peak+clip", lambda b: levels(b)),
+        ("Meter.update()", lambda b: meter.update(b)),
+    ]
+    print(f"\n--- {n} buffers of {SAMPLES} samples ---")
+    results = {}
+    rounds = max(1, n // len(buffers))
+    for name, fn in cases:
+        best = min(timeit.repeat(lambda: [fn(b) for b in buffers], number=rounds, repeat=3)) / (rounds * len(buffers))
+        results[name] = best
+        print(f"{name:<26}{best * 1e6:9.1f} µs/buffer")
+    print(f"\nlevels() is {results['old RMS (struct + sum)'] / results['levels() rms+peak+clip']:.0f}x faster than the old RMS")
+
+    b = buffers[0]
+    rms, peak, _ = levels(b)
+    print(f"sanity: old RMS {old_rms(b):.1f} vs new {rms * 32768:.1f}; old 'peak' {old_peak(b)} (a byte value, 0-255) vs real peak {peak * 32768:.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import glob
+import random
+import sys
+import time
+import missions
+import objections
+from cue_cache import normalize
+
+# --- OBJECTION MATCHER BENCHMARK ---
+# Usage: python bench_objections.py [logs/call_*.txt ...]
+# Leave-one-call-out over the archived calls: each call is replayed against an index built
+# from its mission's branches plus every OTHER call of that mission, so no call is scored
+# against its own answers. A provisional cue counts as correct when it shares at least
+# CORRECT_OVERLAP of its words with the [ME] line that actually followed (the cue the rep got).
+# Latency is per match() call, on the real index and on one padded to MAX_ENTRIES.
+
+CORRECT_OVERLAP = 0.5
+
+
+def overlap(a, b):
+    a, b = set(normalize(a).split()), set(normalize(b).split())
+    return len(a & b) / len(a | b) if a | b else 0.0
+
+
+def percentile(values, p):
+    """Nearest-rank percentile."""
+    values = sorted(values)
+    return values[max(0, -(-len(values) * p // 100) - 1)] if values else 0.0
+
+
+def timed(index, texts, stage=None):
+    times = []
+    for text in texts:
+        started = time.perf_counter()
+        index.match(text, stage)
+        times.append((time.perf_counter() - started) * 1e6)
+    return times
+
+
+def main():
+    paths = sys.argv[1:] or sorted(glob.glob("logs/call_*.txt"))
+    calls = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8-sig") as f: first = f.readline()
+        name = first.split(":", 1)[1].strip() if first.startswith("MISSION:") else None
+        mission_file = missions.find(name) if name else None
+        if mission_file: calls.append((path, missions.load(mission_file)))
+        else: print(f"⚠️ {path}: no mission file for '{name}', skipped")
+    if not calls:
+        print("No call logs with a known mission.")
+        sys.exit(1)
+
+    objections.np.zeros(1)  # import numpy up front so the first build isn't timed with it
+    utterances = matched = correct = 0
+    times, builds, rows = [], [], []
+    for path, mission in calls:
+        others = [p for p, m in calls if m.name == mission.name and p != path]
+        started = time.perf_counter()
+        index = objections.build_index(mission, log_paths=others)
+        builds.append((time.perf_counter() - started) * 1000)
+        tracker = missions.StageTracker(mission)
+        for them, me in objections.call_pairs(path):
+            utterances += 1
+            t0 = time.perf_counter()
+            hit = index.match(them, tracker.current, tracker.upcoming)
+            times.append((time.perf_counter() - t0) * 1e6)
+            if hit:
+                matched += 1
+                ok = overlap(hit.cue, me) >= CORRECT_OVERLAP
+                correct += ok
+                rows.append(("✅" if ok else "❌", hit.score, hit.source, them, hit.cue))
+            tracker.observe(me)
+
+    print(f"\n--- {len(calls)} calls, {utterances} [THEM] utterances ---")
+    for mark, score, source, them, cue in rows: print(f"{mark} {score:.2f} {source:<6} {them[:38]!r:<42} -> {cue[:50]!r}")
+    precision = correct / matched if matched else 0.0
+    print(f"\nmatched {matched}/{utterances} ({matched / utterances:.0%} coverage), precision {precision:.0%} ({correct}/{matched})")
+    print(f"build  p50 {percentile(builds, 50):.2f} ms / max {max(builds):.2f} ms per index")
+    print(f"match  p50 {percentile(times, 50):.0f} µs / p99 {percentile(times, 99):.0f} µs / max {max(times):.0f} µs")
+
+    # Worst case size: pad one index to MAX_ENTRIES with entries made of words from the logs
+    path, mission = calls[0]
+    texts = [them for p, _ in calls for them, _ in objections.call_pairs(p)]
+    vocab = sorted({w for t in texts for w in normalize(t).split()}) or ["word"]
+    rng = random.Random(0)
+    index = objections.ObjectionIndex()
+    index.add_mission(mission)
+    while len(index.entries) < objections.MAX_ENTRIES:
+        index.add(" ".join(rng.choices(vocab, k=8)), f"cue {len(index.entries)}", "pad")
+    index.build()
+    big = timed(index, texts * 20, "1")
+    print(f"match  p50 {percentile(big, 50):.0f} µs / p99 {percentile(big, 99):.0f} µs at {len(index.entries)} entries")
+
+
+if __name__ == "__main__":
+    main()
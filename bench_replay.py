@@ -0,0 +1,404 @@
+import glob
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import wave
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import missions
+import objections
+
+# --- OFFLINE REPLAY BENCHMARK ---
+# Usage: python bench_replay.py [logs/call_*.txt | call.wav ...] [--ttft-ms 400] [--token-ms 15]
+#                               [--jitter 0.2] [--no-stream] [--gap 0] [--limit N] [--mission NAME]
+# Replays recorded calls through the HUD's own pipeline: _audio_loop -> AIScheduler ->
+# _run_ai -> UpdatePump -> _parse_ai / _update_cue, with the OpenAI client pointed at a
+# local stand-in server (OpenAI-compatible, canned answers, configurable latency). No Tk
+# window, no microphone, no API spend.
+#  - Transcript logs: each [THEM] line is returned by recorder.text(); the stand-in answers
+#    with the rep's next [ME] line as the cue. --gap 0 waits for each cue before the next line.
+#  - WAV files (16 kHz mono): fed in real time to RealtimeSTT with use_microphone=False.
+# Reports p50/p95/p99 per stage and throughput. Exits non-zero if p95 total misses TARGET_P95_S.
+
+TARGET_P95_S = 2.0
+UTTERANCE_TIMEOUT = 30.0
+FEED_CHUNK = 1024  # samples per feed_audio() call, same as the mic buffer
+STAGES = ["schedule", "build", "first_token", "stream", "render", "total"]
+
+
+# --- STAND-IN LLM SERVER ---
+
+class FakeLLM(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, ttft_ms=400, token_ms=15, jitter=0.2, answers=None):
+        super().__init__(("127.0.0.1", 0), FakeLLMHandler)
+        self.ttft = ttft_ms / 1000
+        self.token = token_ms / 1000
+        self.jitter = jitter
+        self.answers = answers or {}  # "[THEM]: text" -> cue
+        self.lock = threading.Lock()
+        self.received = []  # perf_counter() at each cue request
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def base_url(self): return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+    def delay(self, seconds):
+        time.sleep(max(0.0, seconds * random.uniform(1 - self.jitter, 1 + self.jitter)))
+
+    def answer(self, model, messages):
+        last = messages[-1]["content"] if messages else ""
+        if model != "gpt-4o": return "Prospect discussed their current setup and pricing."  # memory summarizer
+        cue = self.answers.get(last.strip(), "Ask what matters most to them this season.")
+        return f'[NOTE]: Said: {last.split(":", 1)[-1].strip()[:60]}\n[CUE]: "{cue}" | keep it moving'
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    def log_message(self, *a): pass
+
+    def do_POST(self):
+        received = time.perf_counter()
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        server = self.server
+        messages = body.get("messages", [])
+        content = server.answer(body.get("model"), messages)
+        if body.get("model") == "gpt-4o":
+            with server.lock: server.received.append(received)
+        prompt_tokens = sum(len(m.get("content", "")) for m in messages) // 4
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(content) // 4,
+                 "total_tokens": prompt_tokens + len(content) // 4,
+                 "prompt_tokens_details": {"cached_tokens": prompt_tokens // 2}}
+        base = {"id": "chatcmpl-replay", "created": int(time.time()), "model": body.get("model", "gpt-4o")}
+        server.delay(server.ttft)
+
+        if not body.get("stream"):
+            self._send(200, "application/json", json.dumps(dict(base, object="chat.completion", usage=usage, choices=[
+                {"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}])).encode())
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        chunk = dict(base, object="chat.completion.chunk")
+        words = content.split(" ")
+        for i, word in enumerate(words):
+            if i: server.delay(server.token)
+            delta = {"content": word + (" " if i < len(words) - 1 else "")}
+            if not i: delta["role"] = "assistant"
+            self._event(dict(chunk, choices=[{"index": 0, "delta": delta, "finish_reason": None}]))
+        self._event(dict(chunk, choices=[{"index": 0, "delta": {}, "finish_reason": "stop"}]))
+        if (body.get("stream_options") or {}).get("include_usage"): self._event(dict(chunk, choices=[], usage=usage))
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+    def _event(self, payload):
+        self.wfile.write(f"data: {json.dumps(payload)}\n\n".encode())
+        self.wfile.flush()
+
+    def _send(self, code, kind, data):
+        self.send_response(code)
+        self.send_header("Content-Type", kind)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+# --- REPLAY INPUTS ---
+
+def load_transcript(path):
+    """(mission, [THEM] lines, {"[THEM]: line": next [ME] line}) from a logs/call_*.txt file."""
+    mission, them, answers, last = "NONE", [], {}, None
+    with open(path, "r", encoding="utf-8-sig") as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith("MISSION:"): mission = line.split(":", 1)[1].strip()
+            elif line.startswith("[THEM]:"):
+                last = line[len("[THEM]:"):].strip()
+                if last: them.append(last)
+            elif line.startswith("[ME]:") and last:
+                answers[f"[THEM]: {last}"] = line[len("[ME]:"):].strip().strip('"')
+                last = None
+    return mission, them, answers
+
+
+class TranscriptRecorder:
+    """recorder.text() stand-in: hands out one [THEM] line per call once the harness releases it."""
+    def __init__(self, lines):
+        self.lines = list(lines)
+        self.release = threading.Semaphore(0)
+
+    def text(self):
+        self.release.acquire()
+        if not self.lines: raise EOFError("replay finished")
+        return self.lines.pop(0)
+
+
+class WavRecorder:
+    """Real RealtimeSTT recorder fed from a WAV file in real time instead of the mic."""
+    def __init__(self, path):
+        import RealtimeSTT
+        import stt_calibrate
+        config, _ = stt_calibrate.load_config()
+        self.recorder = RealtimeSTT.AudioToTextRecorder(
+            model=config["final"]["model"], compute_type=config["final"]["compute_type"],
+            language="en", spinner=False, use_microphone=False, enable_realtime_transcription=False)
+        self.path = path
+        self.done = threading.Event()
+        threading.Thread(target=self._feed, daemon=True).start()
+
+    def _feed(self):
+        try: self._feed_file()
+        except Exception as e: print(f"❌ REPLAY: {self.path}: {e}")
+        finally: self.done.set()
+
+    def _feed_file(self):
+        with wave.open(self.path, "rb") as w:
+            if w.getnchannels() != 1 or w.getsampwidth() != 2: raise ValueError(f"{self.path}: need 16-bit mono")
+            rate = w.getframerate()
+            while True:
+                data = w.readframes(FEED_CHUNK)
+                if not data: break
+                self.recorder.feed_audio(data, original_sample_rate=rate)
+                time.sleep(FEED_CHUNK / rate)
+        self.recorder.feed_audio(b"\0" * rate * 2, original_sample_rate=rate)  # 1 s of silence so the last utterance ends
+        time.sleep(UTTERANCE_TIMEOUT / 3)  # last transcription + cue
+
+    def text(self): return self.recorder.text()
+
+
+# --- HEADLESS HUD ---
+# The real ModernHUD methods, bound to an object without a Tk window. The pump is the real
+# UpdatePump on a timer-driven stand-in root, and panels are list-backed stand-in widgets.
+
+class FakeRoot:
+    def after(self, ms, fn):
+        t = threading.Timer(ms / 1000, fn)
+        t.daemon = True
+        t.start()
+
+
+class FakePanel:
+    def __init__(self, name, on_insert):
+        self.name = name
+        self.lines = []
+        self.on_insert = on_insert
+
+    def insert(self, index, *parts):
+        self.lines.append("".join(parts[::2]))
+        self.on_insert(self.name)
+
+    def see(self, *a): pass
+
+
+def headless_hud(client, mission, on_message, on_insert, workdir):
+    import app
+    import backend
+    from memory import ConversationMemory
+    from cue_cache import CueCache
+    from journal import CallJournal
+    from notes import NoteStore
+    from scheduler import AIScheduler, Speculator
+    from tracing import LatencyTracer
+    from ui_pump import UpdatePump
+
+    class ReplayHUD:
+        _audio_loop = app.ModernHUD._audio_loop
+        _instant_cue = app.ModernHUD._instant_cue
+        _run_ai = app.ModernHUD._run_ai
+        _run_ai_stream = app.ModernHUD._run_ai_stream
+        _report_prefix_reuse = app.ModernHUD._report_prefix_reuse
+        _parse_ai = app.ModernHUD._parse_ai
+        _update_cue = app.ModernHUD._update_cue
+        _stream_cue = app.ModernHUD._stream_cue
+        _end_cue_stream = app.ModernHUD._end_cue_stream
+        _handle_message = app.ModernHUD._handle_message
+
+    hud = ReplayHUD()
+    hud.client = client
+    hud.active_mission_name = mission.name
+    hud.mission = mission
+    hud.cue_mode = "SCRIPT"
+    hud.lead_data_context = ""
+    hud.stage = missions.StageTracker(mission)
+    hud._cue_streaming = False
+    hud._cue_stream_text = []
+    hud.unique_notes = NoteStore()
+    hud.transcript_history = ConversationMemory(lambda summary, lines: backend.summarize_history(client, summary, lines), budget=app.PROMPT_TOKEN_BUDGET)
+    hud.prompt_builder = backend.PromptBuilder()
+    hud.cue_cache = CueCache(os.path.join(workdir, "cue_cache.sqlite"))
+    hud.objection_index = objections.build_index(mission, hud.cue_cache) if app.MATCH_OBJECTIONS else None
+    hud.journal = CallJournal(os.path.join(workdir, "journal"))
+    hud.journal.start(mission.name)
+    hud.tracer = LatencyTracer()
+    hud.gui_queue = UpdatePump(FakeRoot(), hud._handle_message)
+    pump_put = hud.gui_queue.put
+
+    def traced_put(item):
+        on_message(*item)  # stamped when the worker emits, before the frame delay
+        pump_put(item)
+
+    hud.gui_queue.put = traced_put
+    hud.ai_scheduler = AIScheduler(hud._run_ai, traced_put)
+    hud.speculator = Speculator(hud.ai_scheduler, hud._run_ai, lambda cue: hud.stage.observe(cue))
+    hud.txt_transcript, hud.txt_cue, hud.txt_notepad = (FakePanel(n, on_insert) for n in ("transcript", "cue", "notepad"))
+    return hud
+
+
+# --- TRACING ---
+
+class Tracer:
+    """Follows one utterance at a time: text() return -> _run_ai -> request -> tokens -> cue on screen."""
+    def __init__(self, server):
+        self.server = server
+        self.lock = threading.Lock()
+        self.current = None
+        self.traces = []
+        self.superseded = 0
+        self.finished = threading.Event()
+
+    def utterance(self):
+        with self.lock:
+            if self.current and "render" not in self.current: self.superseded += 1
+            self.current = {"text_returned": time.perf_counter()}
+            self.finished.clear()
+
+    def message(self, msg, content):
+        now = time.perf_counter()
+        with self.lock:
+            t = self.current
+            if t is None: return
+            if msg == "ai" and content == "[ANALYZING...]": t.setdefault("run_ai", now)
+            elif msg == "cue_token": t.setdefault("first_token", now)
+            elif msg == "cue_end" and "first_token" in t: t.setdefault("final_token", now)
+            elif msg == "ai" and "[CUE]:" in content and "⚡" not in content:  # non-streaming answer
+                t.setdefault("first_token", now)
+                t.setdefault("final_token", now)
+
+    def insert(self, panel):
+        now = time.perf_counter()
+        with self.lock:
+            t = self.current
+            if panel != "cue" or t is None or "final_token" not in t or "render" in t: return
+            t["render"] = now
+            with self.server.lock:
+                sent = [r for r in self.server.received if t["run_ai"] <= r <= t["first_token"]]
+            t["request_sent"] = sent[-1] if sent else t["run_ai"]
+            self.traces.append(t)
+            self.finished.set()
+
+    def stages(self):
+        rows = []
+        for t in self.traces:
+            rows.append({
+                "schedule": t["run_ai"] - t["text_returned"],          # debounce + scheduler
+                "build": t["request_sent"] - t["run_ai"],              # prompt build + HTTP send
+                "first_token": t["first_token"] - t["request_sent"],   # model time to first cue word
+                "stream": t["final_token"] - t["first_token"],
+                "render": t["render"] - t["final_token"],              # pump frame + panel insert
+                "total": t["render"] - t["text_returned"],
+            })
+        return rows
+
+
+def percentile(values, p):
+    """Nearest-rank percentile."""
+    values = sorted(values)
+    if not values: return float("nan")
+    return values[max(0, math.ceil(p / 100 * len(values)) - 1)]
+
+
+# --- MAIN ---
+
+def parse_args(argv):
+    opts = {"ttft_ms": 400, "token_ms": 15, "jitter": 0.2, "stream": True, "gap": 0.0, "limit": None, "mission": "SELL_DRONES", "inputs": []}
+    it = iter(argv)
+    for arg in it:
+        if arg == "--no-stream": opts["stream"] = False
+        elif arg == "--mission": opts["mission"] = next(it).upper()
+        elif arg.startswith("--"): opts[arg[2:].replace("-", "_")] = float(next(it))
+        else: opts["inputs"].append(arg)
+    if opts["limit"] is not None: opts["limit"] = int(opts["limit"])
+    if not opts["inputs"]: opts["inputs"] = sorted(glob.glob(os.path.join("logs", "call_*.txt")))
+    return opts
+
+
+def replay(path, opts, server, client, tracer, workdir):
+    if path.lower().endswith(".wav"):
+        mission, recorder, lines = opts["mission"], WavRecorder(path), None
+    else:
+        mission, lines, answers = load_transcript(path)
+        if opts["limit"]: lines = lines[:opts["limit"]]
+        server.answers.update(answers)
+        recorder = TranscriptRecorder(lines)
+    mission_file = missions.find(mission)
+    mission = missions.load(mission_file) if mission_file else missions.parse(f"MISSION: {mission}", mission.upper())
+
+    hud = headless_hud(client, mission, tracer.message, tracer.insert, workdir)
+
+    class TracedRecorder:
+        def text(self):
+            text = recorder.text()
+            if text.strip(): tracer.utterance()
+            return text
+
+    hud.recorder = TracedRecorder()
+    threading.Thread(target=hud._audio_loop, daemon=True).start()
+
+    if lines is None:
+        recorder.done.wait()
+    else:
+        for _ in range(len(lines)):
+            recorder.release.release()
+            if opts["gap"]: time.sleep(opts["gap"])
+            elif not tracer.finished.wait(UTTERANCE_TIMEOUT): print(f"⚠️ REPLAY: No cue within {UTTERANCE_TIMEOUT:.0f}s")
+            tracer.finished.clear()
+        time.sleep(1.0)  # let the last paced request land
+    hud.journal.close()
+    return hud
+
+
+def main():
+    opts = parse_args(sys.argv[1:])
+    os.environ["STREAM_CUES"] = "1" if opts["stream"] else "0"
+    os.environ.setdefault("OPENAI_API_KEY", "sk-replay")
+    import openai
+
+    server = FakeLLM(opts["ttft_ms"], opts["token_ms"], opts["jitter"])
+    client = openai.OpenAI(api_key="sk-replay", base_url=server.base_url)
+    tracer = Tracer(server)
+    print(f"REPLAY: {len(opts['inputs'])} input(s), stand-in LLM at {server.base_url} "
+          f"(TTFT {opts['ttft_ms']:.0f} ms, {opts['token_ms']:.0f} ms/token, stream={opts['stream']})")
+
+    started = time.perf_counter()
+    with tempfile.TemporaryDirectory() as workdir:
+        for path in opts["inputs"]:
+            print(f"--- {path}")
+            hud = replay(path, opts, server, client, tracer, workdir)
+            print(f"    scheduler: {hud.ai_scheduler.summary()}")
+            print(f"    pump: {hud.gui_queue.summary()}")
+    wall = time.perf_counter() - started
+    server.shutdown()
+
+    rows = tracer.stages()
+    if not rows:
+        print("❌ No utterance produced a cue.")
+        sys.exit(2)
+    print(f"\n{'stage':<12}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}   (ms, {len(rows)} utterances)")
+    for stage in STAGES:
+        values = [r[stage] * 1000 for r in rows]
+        print(f"{stage:<12}{percentile(values, 50):9.1f}{percentile(values, 95):9.1f}{percentile(values, 99):9.1f}{max(values):9.1f}")
+    print(f"\nthroughput {len(rows) / wall:.2f} cues/s over {wall:.1f}s, {tracer.superseded} superseded before render")
+
+    p95 = percentile([r["total"] for r in rows], 95)
+    verdict = "✅ OK" if p95 <= TARGET_P95_S else "❌ OVER TARGET"
+    print(f"p95 total {p95:.2f}s / target {TARGET_P95_S:.2f}s  {verdict}")
+    sys.exit(0 if p95 <= TARGET_P95_S else 1)
+
+
+if __name__ == "__main__":
+    main()
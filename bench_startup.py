@@ -0,0 +1,63 @@
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+# --- COLD-START BENCHMARK ---
+# Usage: python bench_startup.py [runs]
+# 1. Import profile: `python -X importtime -c "import app"`, slowest modules by cumulative time.
+# 2. Time-to-window: launches app.py with KLIX_EXIT_AFTER_WINDOW=1 (window comes up, then exits).
+# Exits non-zero if the median time-to-window misses TARGET_WINDOW_S.
+
+TARGET_WINDOW_S = 1.0
+TOP_IMPORTS = 12
+
+def import_profile():
+    started = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app"], capture_output=True, text=True)
+    wall = time.perf_counter() - started
+    rows = []
+    for line in proc.stderr.splitlines():
+        m = re.match(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)", line)
+        if m: rows.append((int(m.group(2)), len(m.group(3)), m.group(4)))
+    if proc.returncode != 0:
+        print(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "import failed")
+    return wall, rows
+
+def time_to_window():
+    env = dict(os.environ, KLIX_EXIT_AFTER_WINDOW="1", OPENAI_API_KEY=os.getenv("OPENAI_API_KEY") or "sk-bench")
+    started = time.perf_counter()
+    proc = subprocess.run([sys.executable, "app.py"], capture_output=True, text=True, env=env)
+    wall = time.perf_counter() - started
+    m = re.search(r"window_shown ([\d.]+)s", proc.stdout)
+    return wall, float(m.group(1)) if m else None, proc
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    print("\n--- IMPORT PROFILE (import app) ---")
+    wall, rows = import_profile()
+    top_level = [r for r in rows if r[1] <= 1]
+    for cumulative, _, name in sorted(top_level, reverse=True)[:TOP_IMPORTS]:
+        print(f"{cumulative / 1000:9.1f} ms  {name}")
+    print(f"{wall * 1000:9.1f} ms  total process (incl. interpreter start)")
+
+    print(f"\n--- TIME TO WINDOW ({runs} cold starts) ---")
+    shown = []
+    for i in range(runs):
+        wall, window, proc = time_to_window()
+        if window is None:
+            print(f"run {i + 1}: window never came up\n{(proc.stdout + proc.stderr).strip()[-500:]}")
+            sys.exit(2)
+        shown.append(window)
+        print(f"run {i + 1}: window {window:.2f}s (process {wall:.2f}s)")
+
+    median = statistics.median(shown)
+    verdict = "✅ OK" if median <= TARGET_WINDOW_S else "❌ OVER TARGET"
+    print(f"\nmedian {median:.2f}s / worst {max(shown):.2f}s / target {TARGET_WINDOW_S:.2f}s  {verdict}")
+    sys.exit(0 if median <= TARGET_WINDOW_S else 1)
+
+if __name__ == "__main__":
+    main()
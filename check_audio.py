@@ -1,11 +1,7 @@
-﻿import pyaudio
-p = pyaudio.PyAudio()
+﻿import devices
 print('\n------------------------------------------------')
 print(' 🎤 AVAILABLE INPUT DEVICES')
 print('------------------------------------------------')
-for i in range(p.get_device_count()):
-    info = p.get_device_info_by_index(i)
-    if info['maxInputChannels'] > 0:
-        print(f"INDEX {i}: {info['name']}")
+for i, name, _, _ in devices.list_inputs():
+    print(f"INDEX {i}: {name}")
 print('------------------------------------------------\n')
-p.terminate()
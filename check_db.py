@@ -0,0 +1,101 @@
+import os
+import sys
+import time
+from lazy import lazy
+import db_writer
+
+psycopg2 = lazy("psycopg2")
+extensions = lazy("psycopg2.extensions")
+
+# --- DB WRITER CHECK (local Postgres) ---
+# Usage: TEST_DATABASE_URL=postgresql://postgres@localhost/klix_test python check_db.py
+# Runs the real DBWriter against a scratch schema (dropped and recreated each run, never the
+# app's DATABASE_URL): duplicate-lead merge before the email index, upserts that keep a known
+# name, a rejected row requeued once it can be written, and no pool left behind when the
+# schema step fails. Exits 1 on the first failed check.
+
+SCHEMA = "klix_check"
+TIMEOUT = 10.0
+
+TABLES = f"""
+    DROP SCHEMA IF EXISTS {SCHEMA} CASCADE;
+    CREATE SCHEMA {SCHEMA};
+    CREATE TABLE {SCHEMA}.leads (id SERIAL PRIMARY KEY, name TEXT, email TEXT, status VARCHAR(20),
+                                 created_at TIMESTAMP, updated_at TIMESTAMP);
+    CREATE TABLE {SCHEMA}.calls (id SERIAL PRIMARY KEY, lead_id INT REFERENCES {SCHEMA}.leads (id), mission_name TEXT,
+                                 transcript TEXT, ai_summary TEXT, call_date TIMESTAMP);
+    INSERT INTO {SCHEMA}.leads (name, email, status, created_at) VALUES
+        ('Dana Reyes', 'dana@farm.test', 'NEW', NOW() - INTERVAL '2 days'),
+        ('Unknown Lead', 'dana@farm.test', 'FOLLOW UP', NOW() - INTERVAL '1 day');
+    INSERT INTO {SCHEMA}.calls (lead_id, mission_name, call_date) SELECT id, 'OLD', NOW() FROM {SCHEMA}.leads;
+"""
+
+
+def check(label, ok):
+    print(f"{'✅' if ok else '❌'} {label}")
+    if not ok: sys.exit(1)
+
+
+def wait(done):
+    deadline = time.perf_counter() + TIMEOUT
+    while not done() and time.perf_counter() < deadline: time.sleep(0.05)
+    return done()
+
+
+def main():
+    sys.stdout.reconfigure(encoding='utf-8')
+    base_url = os.getenv("TEST_DATABASE_URL")
+    if not base_url:
+        print("⚠️ TEST_DATABASE_URL is not set: skipped (point it at a local Postgres, not Neon).")
+        return
+    url = extensions.make_dsn(base_url, options=f"-csearch_path={SCHEMA}")
+    admin = psycopg2.connect(base_url)
+    admin.autocommit = True
+    cur = admin.cursor()
+    cur.execute(TABLES)
+
+    writer = db_writer.DBWriter(lambda: url, spool_path=":memory:")
+    writer.submit("CHECK", "[THEM]: hi", ["note"], "dana@farm.test", None, "BOOKED")
+    writer.submit("CHECK", "[THEM]: who is this", [], None, None, "NO ANSWER")
+    check("spooled calls written", wait(lambda: writer.stats["written"] == 2))
+    cur.execute(f"SELECT id, name, status FROM {SCHEMA}.leads WHERE email = 'dana@farm.test'")
+    leads = cur.fetchall()
+    check("duplicate leads merged into one", len(leads) == 1)
+    check("known name kept over 'Unknown Lead'", leads[0][1] == "Dana Reyes")
+    check("newest status applied", leads[0][2] == "BOOKED")
+    cur.execute(f"SELECT COUNT(*) FROM {SCHEMA}.calls WHERE lead_id = %s", (leads[0][0],))
+    check("old and new calls on the merged lead", cur.fetchone()[0] == 3)
+    cur.execute("SELECT to_regclass(%s)", (f"{SCHEMA}.leads_email_key",))
+    check("email index created", cur.fetchone()[0] is not None)
+    writer.close()
+
+    # A file spool, so the rejected row is still there for the next writer to requeue on start
+    spool_path = f"{SCHEMA}_spool.sqlite"
+    try:
+        writer = db_writer.DBWriter(lambda: url, spool_path=spool_path)
+        writer.submit("CHECK", "", [], "kim@farm.test", "Kim", "X" * 40)
+        check("rejected row marked failed", wait(lambda: writer.stats["failed"] == 1))
+        writer.close()
+        cur.execute(f"ALTER TABLE {SCHEMA}.leads ALTER COLUMN status TYPE TEXT")
+        writer = db_writer.DBWriter(lambda: url, spool_path=spool_path)
+        check("failed row requeued and written on the next start", wait(lambda: writer.stats["written"] == 1))
+        writer.close()
+        writer.spool.close()
+    finally:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(spool_path + suffix): os.remove(spool_path + suffix)
+
+    cur.execute(f"DROP TABLE {SCHEMA}.calls; DROP TABLE {SCHEMA}.leads")
+    writer = db_writer.DBWriter(lambda: url, spool_path=":memory:")
+    writer.submit("CHECK", "", [], None, None, "NO TABLE")
+    check("schema failure marks the row failed", wait(lambda: writer.stats["failed"] == 1))
+    check("no pool kept after a schema failure", writer.pool is None)
+    writer.close()
+
+    cur.execute(f"DROP SCHEMA {SCHEMA} CASCADE")
+    admin.close()
+    print("✅ DB writer checks passed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+
+# --- CUE CACHE ---
+# Reps run the same missions all day, so the same objections come back again and again.
+# Cues are cached on disk keyed by (mission, cue mode, stage, normalized objection text).
+# A hit is shown instantly; the LLM call still runs and refreshes the entry in the background.
+# Expired entries are dropped once when the cache opens, so get() stays a single lookup.
+
+CACHE_FILE = os.getenv("CUE_CACHE_FILE", "cue_cache.db")
+MAX_ENTRIES = 2000
+TTL_SECONDS = 14 * 24 * 3600
+FUZZY_MATCH = 0.8   # word-set similarity for a near-identical hit
+MIN_WORDS = 3       # "yeah" / "okay" depend on context, never serve those from cache
+
+FILLER = {"um", "uh", "uhh", "umm", "er", "ah", "oh", "like", "well", "so", "yeah", "okay", "ok", "just", "actually", "basically"}
+
+
+def normalize(text):
+    words = re.sub(r"[^\w\s%]", " ", text.lower()).split()
+    return " ".join(w for w in words if w not in FILLER)
+
+
+class CueCache:
+    def __init__(self, path=CACHE_FILE, max_entries=MAX_ENTRIES, ttl=TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS cues (
+                mission TEXT, mode TEXT, stage TEXT, input TEXT, cue TEXT,
+                created REAL, last_used REAL, hits INTEGER DEFAULT 0,
+                PRIMARY KEY (mission, mode, stage, input))
+        """)
+        self.db.execute("CREATE INDEX IF NOT EXISTS cues_lru ON cues (last_used)")
+        self.stats = {"hits": 0, "fuzzy_hits": 0, "misses": 0, "skipped": 0, "expired": 0, "evicted": 0}
+        self.stats["expired"] = self.db.execute("DELETE FROM cues WHERE created < ?", (time.time() - ttl,)).rowcount
+        self.db.commit()
+
+    def get(self, mission, mode, stage, text):
+        """Returns a cached cue for this objection, or None."""
+        key = normalize(text)
+        if len(key.split()) < MIN_WORDS:
+            self.stats["skipped"] += 1
+            return None
+        now = time.time()
+        with self.lock:
+            scope = (mission, mode, str(stage))
+            row = self.db.execute("SELECT input, cue FROM cues WHERE mission=? AND mode=? AND stage=? AND input=? AND created >= ?",
+                                  scope + (key, now - self.ttl)).fetchone()
+            if row: self.stats["hits"] += 1
+            else:
+                row = self._nearest(scope, key)
+                self.stats["fuzzy_hits" if row else "misses"] += 1
+            if row:
+                self.db.execute("UPDATE cues SET last_used=?, hits=hits+1 WHERE mission=? AND mode=? AND stage=? AND input=?", (now,) + scope + (row[0],))
+            self.db.commit()
+            return row[1] if row else None
+
+    def _nearest(self, scope, key):
+        words = set(key.split())
+        best, best_score = None, FUZZY_MATCH
+        for row in self.db.execute("SELECT input, cue FROM cues WHERE mission=? AND mode=? AND stage=? AND created >= ?", scope + (time.time() - self.ttl,)):
+            other = set(row[0].split())
+            score = len(words & other) / len(words | other)
+            if score >= best_score: best, best_score = row, score
+        return best
+
+    def put(self, mission, mode, stage, text, cue):
+        key = normalize(text)
+        if len(key.split()) < MIN_WORDS or not cue: return
+        now = time.time()
+        with self.lock:
+            self.db.execute("""
+                INSERT INTO cues (mission, mode, stage, input, cue, created, last_used) VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (mission, mode, stage, input) DO UPDATE SET cue=excluded.cue, created=excluded.created, last_used=excluded.last_used
+            """, (mission, mode, str(stage), key, cue, now, now))
+            over = self.db.execute("SELECT COUNT(*) FROM cues").fetchone()[0] - self.max_entries
+            if over > 0:
+                self.db.execute("DELETE FROM cues WHERE rowid IN (SELECT rowid FROM cues ORDER BY last_used LIMIT ?)", (over,))
+                self.stats["evicted"] += over
+            self.db.commit()
+
+    def entries(self, mission, mode, limit):
+        """[(normalized input, cue, stage)] for a mission, most used first."""
+        with self.lock:
+            return self.db.execute("SELECT input, cue, stage FROM cues WHERE mission=? AND mode=? ORDER BY hits DESC, last_used DESC LIMIT ?",
+                                   (mission, mode, limit)).fetchall()
+
+    def summary(self):
+        s = self.stats
+        lookups = s["hits"] + s["fuzzy_hits"] + s["misses"]
+        rate = (s["hits"] + s["fuzzy_hits"]) / lookups if lookups else 0.0
+        return (f"{rate:.0%} hit rate ({s['hits']} exact, {s['fuzzy_hits']} near, {s['misses']} misses, "
+                f"{s['skipped']} too short), {s['expired']} expired, {s['evicted']} evicted")
@@ -0,0 +1,169 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import applog
+import backend
+from lazy import lazy
+
+psycopg2 = lazy("psycopg2")
+psycopg2_pool = lazy("psycopg2.pool")
+log = applog.get("db")
+
+# --- BACKGROUND DB WRITER ---
+# Saves never touch the network on the Tk thread. Every save is first written to a local
+# SQLite spool (durable, a few ms), then a single writer thread pushes it to Postgres over
+# a persistent pooled connection and deletes it from the spool. If Neon is unreachable the
+# row stays spooled and is retried with backoff, including after a restart. Rows Postgres
+# rejects outright are kept as 'failed': each start requeues them until they've had
+# FAILED_RETRY_LIMIT attempts, and `python db_writer.py --retry-failed` requeues them all.
+#
+# Usage: python db_writer.py [--retry-failed]   (spool summary / requeue failed rows)
+# Local Postgres check: TEST_DATABASE_URL=postgresql://postgres@localhost/klix_test python check_db.py
+
+SPOOL_FILE = os.getenv("DB_SPOOL_FILE", "db_spool.sqlite")
+POOL_SIZE = 2
+BACKOFF_START = 0.5
+BACKOFF_MAX = 60.0
+FAILED_RETRY_LIMIT = 5
+
+
+def transient_errors():
+    """Connection-level problems are worth retrying; anything else (bad SQL, constraint) is not."""
+    return (psycopg2.OperationalError, psycopg2.InterfaceError)
+
+
+def open_spool(path=SPOOL_FILE):
+    spool = sqlite3.connect(path, check_same_thread=False)
+    spool.execute("PRAGMA journal_mode=WAL")
+    spool.execute("""
+        CREATE TABLE IF NOT EXISTS spool (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, payload TEXT NOT NULL,
+            state TEXT DEFAULT 'pending', attempts INTEGER DEFAULT 0, last_error TEXT, created REAL)
+    """)
+    spool.commit()
+    return spool
+
+
+def requeue_failed(spool, max_attempts=None):
+    """Puts 'failed' rows (only those with fewer than max_attempts tries, if given) back to 'pending'."""
+    cur = spool.execute("UPDATE spool SET state = 'pending' WHERE state = 'failed' AND attempts < ?",
+                        (max_attempts if max_attempts is not None else 2 ** 31,))
+    spool.commit()
+    return cur.rowcount
+
+
+class DBWriter:
+    def __init__(self, get_db_url, spool_path=SPOOL_FILE, on_result=None, pool_size=POOL_SIZE):
+        self.get_db_url = get_db_url
+        self.on_result = on_result or (lambda ok, label, msg: None)  # called on the writer thread
+        self.pool_size = pool_size
+        self.pool = None
+        self.spool = open_spool(spool_path)
+        requeued = requeue_failed(self.spool, FAILED_RETRY_LIMIT)
+        if requeued: log.info("🔁 Requeued %d failed call(s) from the spool.", requeued)
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.stopping = False
+        self.stats = {"written": 0, "retries": 0, "failed": 0}
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        if self.pending(): self.wake.set()  # leftovers from a previous session
+
+    def submit(self, mission, transcript, notes, client_email, client_name, status):
+        """Spools the call and returns at once; the writer thread does the network work."""
+        payload = json.dumps({"mission": mission, "transcript": transcript, "notes": list(notes),
+                              "client_email": client_email, "client_name": client_name, "status": status})
+        with self.lock:
+            self.spool.execute("INSERT INTO spool (payload, created) VALUES (?, ?)", (payload, time.time()))
+            self.spool.commit()
+        self.wake.set()
+
+    def pending(self):
+        with self.lock:
+            return self.spool.execute("SELECT COUNT(*) FROM spool WHERE state = 'pending'").fetchone()[0]
+
+    def close(self):
+        """Stops the writer. Anything not yet written stays in the spool for next time."""
+        self.stopping = True
+        self.wake.set()
+        self.thread.join(timeout=2)
+        if self.pool: self.pool.closeall()
+
+    def _connect(self):
+        if self.pool is None:
+            db_url = self.get_db_url()
+            if not db_url: raise psycopg2.OperationalError("No Database URL configured.")
+            pool = psycopg2_pool.ThreadedConnectionPool(1, self.pool_size, db_url)
+            try:
+                conn = pool.getconn()
+                merged = backend.ensure_schema(conn)
+                pool.putconn(conn)
+            except Exception:
+                pool.closeall()
+                raise
+            if merged: log.info("🔀 Merged %d duplicate lead(s) before adding the email index.", merged)
+            self.pool = pool
+        return self.pool.getconn()
+
+    def _run(self):
+        delay = None
+        while True:
+            self.wake.wait(timeout=delay)
+            self.wake.clear()
+            if self.stopping: return
+            delay = self._drain()
+
+    def _drain(self):
+        """Writes spooled rows oldest first. Returns the backoff delay, or None when the spool is empty."""
+        while not self.stopping:
+            with self.lock:
+                row = self.spool.execute("SELECT id, payload, attempts FROM spool WHERE state = 'pending' ORDER BY id LIMIT 1").fetchone()
+            if not row: return None
+            row_id, payload, attempts = row
+            call = json.loads(payload)
+            label = call["client_name"] or call["client_email"] or "Anonymous Caller"
+            conn = None
+            try:
+                conn = self._connect()
+                backend.write_call(conn, call["mission"], call["transcript"], call["notes"],
+                                   call["client_email"], call["client_name"], call["status"])
+                self.pool.putconn(conn)
+                with self.lock:
+                    self.spool.execute("DELETE FROM spool WHERE id = ?", (row_id,))
+                    self.spool.commit()
+                self.stats["written"] += 1
+                self.on_result(True, label, "Saved")
+            except transient_errors() as e:
+                if conn is not None and self.pool: self.pool.putconn(conn, close=True)
+                self._mark(row_id, "pending", attempts + 1, str(e))
+                self.stats["retries"] += 1
+                if attempts == 0: self.on_result(None, label, f"Offline, spooled ({e})".strip())
+                backoff = min(BACKOFF_START * 2 ** attempts, BACKOFF_MAX)
+                log.warning("⚠️ DB OFFLINE: %d call(s) spooled, retrying in %.1fs", self.pending(), backoff)
+                return backoff
+            except Exception as e:
+                if conn is not None:
+                    try: conn.rollback()
+                    except Exception: pass
+                    self.pool.putconn(conn)
+                self._mark(row_id, "failed", attempts + 1, str(e))
+                self.stats["failed"] += 1
+                self.on_result(False, label, str(e))
+        return None
+
+    def _mark(self, row_id, state, attempts, error):
+        with self.lock:
+            self.spool.execute("UPDATE spool SET state = ?, attempts = ?, last_error = ? WHERE id = ?", (state, attempts, error, row_id))
+            self.spool.commit()
+
+
+if __name__ == "__main__":
+    import sys
+    sys.stdout.reconfigure(encoding='utf-8')
+    spool = open_spool()
+    if "--retry-failed" in sys.argv: print(f"🔁 Requeued {requeue_failed(spool)} failed call(s); the HUD writes them on its next start.")
+    for state, count in spool.execute("SELECT state, COUNT(*) FROM spool GROUP BY state ORDER BY state"): print(f"{state:<8} {count}")
+    for row_id, attempts, error in spool.execute("SELECT id, attempts, last_error FROM spool WHERE state = 'failed' ORDER BY id"):
+        print(f"  #{row_id} ({attempts} attempts): {error}")
@@ -0,0 +1,152 @@
+import sys
+import time
+from lazy import lazy
+from metering import levels, dbfs, CLIP_LEVEL, FLOOR_DB, FULL_SCALE, SILENT_DBFS
+
+pyaudio = lazy("pyaudio")
+
+# --- DEVICE DISCOVERY ---
+# One enumeration of every input, then all of them probed at once: each device gets a PyAudio
+# callback stream that meters its buffers with metering.levels(), so PortAudio's threads
+# listen to every input in parallel and the whole scan takes about one LISTEN_S window
+# instead of LISTEN_S per device.
+# Streams are opened one after another (PortAudio's open/close isn't thread-safe); only the
+# listening overlaps. Each probe is scored on signal level and supported sample rates.
+#
+#   probes = devices.probe_all()            # ranked, best first
+#   devices.best(probes, "Voicemeeter")     # best probe whose name matches, or None
+#
+# Usage (print the ranked table): python devices.py [seconds]
+
+LISTEN_S = 1.5
+PROBE_RATES = (16000, 44100, 48000)  # 16 kHz is what the STT runs at; the others resample cleanly
+CHUNK_MS = 30
+HEARD_DBFS = -50.0                   # RMS above this counts as "heard something"
+
+
+class Probe:
+    def __init__(self, index, name, channels, default_rate):
+        self.index = index
+        self.name = name
+        self.channels = channels
+        self.default_rate = default_rate
+        self.rates = []        # PROBE_RATES the device accepts for mono 16-bit input
+        self.rate = None       # rate the probe stream ran at
+        self.rms_db = None     # loudest buffer RMS in the window (None until audio arrives)
+        self.peak_db = None
+        self.error = None
+
+    def feed(self, data):
+        """Stream callback side: one buffer of int16 PCM."""
+        rms, peak, _ = levels(data)
+        rms_db, peak_db = dbfs(rms), dbfs(peak)
+        self.rms_db = rms_db if self.rms_db is None else max(self.rms_db, rms_db)
+        self.peak_db = peak_db if self.peak_db is None else max(self.peak_db, peak_db)
+
+    @property
+    def usable(self): return self.error is None and self.rms_db is not None
+
+    @property
+    def heard(self): return self.usable and self.rms_db > HEARD_DBFS
+
+    @property
+    def status(self):
+        if not self.usable: return "ERROR"
+        if self.peak_db <= FLOOR_DB: return "DEAD"
+        if self.rms_db <= SILENT_DBFS: return "SILENT"
+        if self.peak_db >= dbfs(CLIP_LEVEL / FULL_SCALE): return "CLIPPING"
+        return "OK"
+
+    def score(self):
+        """Signal first (0-60 for -60..0 dBFS RMS), then rates: native 16 kHz is worth a few dB."""
+        if not self.usable: return -1.0
+        signal = max(0.0, self.rms_db - SILENT_DBFS)
+        if self.status == "CLIPPING": signal -= 10
+        return signal + (5 if 16000 in self.rates else 0) + (2 if 48000 in self.rates else 0)
+
+    def __repr__(self):
+        return f"<Probe {self.index} '{self.name}' {self.status} rms {self.rms_db} dBFS>"
+
+
+def list_inputs(p=None):
+    """[(index, name, max_input_channels, default_sample_rate)] for every input device."""
+    own = p is None
+    if own: p = pyaudio.PyAudio()
+    devices = []
+    try:
+        for i in range(p.get_device_count()):
+            try:
+                info = p.get_device_info_by_index(i)
+                if info['maxInputChannels'] > 0:
+                    devices.append((i, info['name'], info['maxInputChannels'], int(info['defaultSampleRate'])))
+            except Exception: pass
+    finally:
+        if own: p.terminate()
+    return devices
+
+
+def supported_rates(p, index):
+    rates = []
+    for rate in PROBE_RATES:
+        try:
+            if p.is_format_supported(rate, input_device=index, input_channels=1, input_format=pyaudio.paInt16): rates.append(rate)
+        except ValueError: pass
+    return rates
+
+
+def probe_all(seconds=LISTEN_S, devices=None, indexes=None):
+    """Listens to every input (or just `indexes`) at the same time; returns Probes, best first."""
+    p = pyaudio.PyAudio()
+    probes = [Probe(*d) for d in (devices or list_inputs(p)) if indexes is None or d[0] in indexes]
+    streams = []
+    try:
+        for probe in probes:
+            probe.rates = supported_rates(p, probe.index)
+            probe.rate = 16000 if 16000 in probe.rates else (probe.rates[0] if probe.rates else probe.default_rate)
+
+            def callback(data, frames, time_info, flags, probe=probe):
+                probe.feed(data)
+                return None, pyaudio.paContinue
+
+            try:
+                streams.append(p.open(format=pyaudio.paInt16, channels=1, rate=probe.rate, input=True, input_device_index=probe.index,
+                                      frames_per_buffer=probe.rate * CHUNK_MS // 1000, stream_callback=callback))
+            except Exception as e: probe.error = str(e) or type(e).__name__
+        time.sleep(seconds)
+    finally:
+        for stream in streams:
+            try:
+                stream.stop_stream()
+                stream.close()
+            except Exception: pass
+        p.terminate()
+    for probe in probes:
+        if probe.rms_db is None and not probe.error: probe.error = "no audio delivered"
+    return sorted(probes, key=lambda probe: probe.score(), reverse=True)
+
+
+def best(probes, target_name=None):
+    """Best usable probe whose name contains target_name (any usable probe if no name given)."""
+    for probe in probes:
+        if probe.usable and (not target_name or target_name.lower() in probe.name.lower()): return probe
+    return None
+
+
+def table(probes):
+    lines = [f"{'ID':<4} | {'DEVICE NAME':<40} | {'LEVEL':>9} | {'STATUS':<8} | RATES"]
+    lines.append("-" * 84)
+    for probe in probes:
+        level = f"{probe.rms_db:6.1f} dB" if probe.usable else "-"
+        rates = ",".join(f"{r // 1000}k" if r % 1000 == 0 else f"{r / 1000:g}k" for r in probe.rates) or "-"
+        lines.append(f"{probe.index:<4} | {probe.name[:40]:<40} | {level:>9} | {probe.status:<8} | {rates}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    sys.stdout.reconfigure(encoding='utf-8')
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else LISTEN_S
+    print(f"Probing every input for {seconds:.1f}s - speak / play some audio now...")
+    started = time.perf_counter()
+    probes = probe_all(seconds)
+    print(table(probes))
+    print(f"\n{len(probes)} inputs probed in {time.perf_counter() - started:.2f}s")
@@ -0,0 +1,253 @@
+import bisect
+import collections
+import os
+import queue
+import sys
+import threading
+import time
+import numpy as np
+import applog
+import stt_calibrate
+from lazy import lazy
+
+pyaudio = lazy("pyaudio")
+webrtcvad = lazy("webrtcvad")
+faster_whisper = lazy("faster_whisper")
+log = applog.get("capture")
+
+# --- DUAL-STREAM CAPTURE ---
+# Two input channels, each with its own WebRTC VAD, and one shared whisper model:
+#   THEM = the call loopback (the Voicemeeter bus we've always used)
+#   ME   = the rep's own microphone (REP_MIC_NAME)
+# Finished utterances from both channels queue up for a single transcription worker, which
+# takes everything pending at once and runs it as one batch (BatchedInferencePipeline with
+# one clip per utterance), so two people talking over each other still cost one model pass.
+# Stands in for RealtimeSTT's recorder: text() returns [THEM] utterances, on_me(text) gets
+# the rep's, on_recording_stop fires at the end of THEM speech.
+#
+# CPU is measured per thread (capture + VAD, transcription) and bounded: the model gets
+# CPU_THREADS cores, and [ME] utterances are skipped while the worker's busy share over the
+# last DUTY_WINDOW seconds is above ME_MAX_DUTY - the prospect's words always win.
+#
+# Usage (measure on this machine): python dual_capture.py THEM_INDEX ME_INDEX [seconds]
+
+RATE = 16000
+FRAME_MS = 30
+FRAME = RATE * FRAME_MS // 1000
+VAD_MODE = 3                 # same WebRTC sensitivity RealtimeSTT runs with
+START_FRAMES = 3             # ~90 ms of voiced frames opens an utterance
+POST_SPEECH_SILENCE = 0.6    # ...and this much silence closes it
+PRE_ROLL = 0.3
+MIN_UTTERANCE = 0.4
+MAX_UTTERANCE = 28.0         # stay inside one 30 s whisper window
+BEAM_SIZE = 5
+CPU_THREADS = max(1, min(4, (os.cpu_count() or 2) // 2))
+ME_MAX_DUTY = 0.5
+DUTY_WINDOW = 30.0
+CLIP_GAP = 0.2               # silence between clips in a batched buffer
+
+
+def to_16k(samples, rate):
+    """int16 samples at `rate` -> int16 at 16 kHz (block mean for integer ratios, linear otherwise)."""
+    if rate == RATE: return samples
+    if rate % RATE == 0:
+        k = rate // RATE
+        n = len(samples) // k * k
+        return samples[:n].reshape(-1, k).mean(axis=1).astype(np.int16)
+    n = int(len(samples) * RATE / rate)
+    return np.interp(np.linspace(0, len(samples) - 1, n), np.arange(len(samples)), samples).astype(np.int16)
+
+
+class Channel:
+    def __init__(self, speaker, device_index, on_utterance, on_speech_end=None):
+        self.speaker = speaker
+        self.device_index = device_index
+        self.on_utterance = on_utterance    # on_utterance(speaker, float32 audio)
+        self.on_speech_end = on_speech_end
+        self.on_chunk = None                # on_chunk(16 kHz int16 array), for the input meter
+        self.vad = webrtcvad.Vad(VAD_MODE)
+        self.preroll = collections.deque(maxlen=int(PRE_ROLL * 1000 / FRAME_MS))
+        self.frames = None                  # list of frames while an utterance is open
+        self.voiced_run = 0
+        self.silent_run = 0
+        self.cpu = 0.0
+        self.stopping = False
+        self.thread = threading.Thread(target=self._run, name=f"capture-{speaker}", daemon=True)
+
+    def start(self): self.thread.start()
+
+    def _run(self):
+        p = pyaudio.PyAudio()
+        rate = int(p.get_device_info_by_index(self.device_index)["defaultSampleRate"])
+        chunk = rate * FRAME_MS // 1000
+        stream = p.open(format=pyaudio.paInt16, channels=1, rate=rate, input=True, input_device_index=self.device_index, frames_per_buffer=chunk)
+        log.info("🎙️ %s channel on device %d (%d Hz)", self.speaker, self.device_index, rate)
+        pending = np.zeros(0, dtype=np.int16)
+        try:
+            while not self.stopping:
+                data = stream.read(chunk, exception_on_overflow=False)
+                started = time.thread_time()
+                samples = to_16k(np.frombuffer(data, dtype=np.int16), rate)
+                if self.on_chunk: self.on_chunk(samples)
+                pending = np.concatenate((pending, samples))
+                while len(pending) >= FRAME:
+                    self.feed(pending[:FRAME])
+                    pending = pending[FRAME:]
+                self.cpu += time.thread_time() - started
+        except Exception as e: log.error("❌ %s channel stopped: %s", self.speaker, e)
+        finally:
+            stream.close()
+            p.terminate()
+
+    def feed(self, frame):
+        """One 30 ms int16 frame at 16 kHz. Public so recorded audio can be pushed through the same VAD."""
+        voiced = self.vad.is_speech(frame.tobytes(), RATE)
+        if self.frames is None:
+            self.preroll.append(frame)
+            self.voiced_run = self.voiced_run + 1 if voiced else 0
+            if self.voiced_run >= START_FRAMES:
+                self.frames, self.silent_run = list(self.preroll), 0
+            return
+        self.frames.append(frame)
+        self.silent_run = 0 if voiced else self.silent_run + 1
+        if self.silent_run * FRAME_MS / 1000 >= POST_SPEECH_SILENCE or len(self.frames) * FRAME >= MAX_UTTERANCE * RATE:
+            frames, self.frames = self.frames, None
+            self.voiced_run = 0
+            self.preroll.clear()
+            if self.on_speech_end: self.on_speech_end()
+            if len(frames) * FRAME >= MIN_UTTERANCE * RATE:
+                self.on_utterance(self.speaker, np.concatenate(frames).astype(np.float32) / 32768.0)
+
+
+class SharedTranscriber:
+    def __init__(self, on_text, model=None, compute_type=None, cpu_threads=CPU_THREADS):
+        config, _ = stt_calibrate.load_config()
+        model = model or config["final"]["model"]
+        compute_type = compute_type or config["final"]["compute_type"]
+        self.model = faster_whisper.WhisperModel(model, device="cpu", compute_type=compute_type, cpu_threads=cpu_threads, num_workers=1)
+        self.batched = faster_whisper.BatchedInferencePipeline(self.model)
+        self.on_text = on_text  # on_text(speaker, text)
+        self.queue = queue.Queue()
+        self.busy = collections.deque()  # (start, end) of recent transcription passes
+        self.stats = {"utterances": 0, "batches": 0, "audio_s": 0.0, "busy_s": 0.0, "cpu_s": 0.0, "me_skipped": 0}
+        self.thread = threading.Thread(target=self._run, name="transcriber", daemon=True)
+        self.thread.start()
+        log.info("✅ Shared STT model %s/%s on %d threads", model, compute_type, cpu_threads)
+
+    def submit(self, speaker, audio): self.queue.put((speaker, audio))
+
+    def duty(self):
+        """Share of the last DUTY_WINDOW seconds the worker spent transcribing."""
+        now = time.perf_counter()
+        while self.busy and self.busy[0][1] < now - DUTY_WINDOW: self.busy.popleft()
+        return sum(end - max(start, now - DUTY_WINDOW) for start, end in self.busy) / DUTY_WINDOW
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            while True:
+                try: batch.append(self.queue.get_nowait())
+                except queue.Empty: break
+            if self.duty() > ME_MAX_DUTY:
+                skipped = [b for b in batch if b[0] == "ME"]
+                if skipped:
+                    self.stats["me_skipped"] += len(skipped)
+                    log.debug("CPU bound: skipped %d [ME] utterance(s), duty %.0f%%", len(skipped), self.duty() * 100)
+                    batch = [b for b in batch if b[0] != "ME"]
+            if not batch: continue
+            started, cpu = time.perf_counter(), time.process_time()  # CTranslate2 runs its own threads
+            try: texts = self.transcribe([audio for _, audio in batch])
+            except Exception as e:
+                log.error("❌ Transcription failed: %s", e)
+                continue
+            ended = time.perf_counter()
+            self.busy.append((started, ended))
+            s = self.stats
+            s["utterances"] += len(batch)
+            s["batches"] += 1
+            s["audio_s"] += sum(len(audio) for _, audio in batch) / RATE
+            s["busy_s"] += ended - started
+            s["cpu_s"] += time.process_time() - cpu
+            for (speaker, _), text in zip(batch, texts):
+                if text: self.on_text(speaker, text)
+
+    def transcribe(self, clips):
+        """One text per clip; more than one clip goes through the model as a single batch."""
+        if len(clips) == 1:
+            segments, _ = self.model.transcribe(clips[0], language="en", beam_size=BEAM_SIZE, vad_filter=False)
+            return ["".join(s.text for s in segments).strip()]
+        gap = np.zeros(int(CLIP_GAP * RATE), dtype=np.float32)
+        starts, spans, offset = [], [], 0
+        for clip in clips:
+            starts.append(offset / RATE)
+            spans.append({"start": offset / RATE, "end": (offset + len(clip)) / RATE})
+            offset += len(clip) + len(gap)
+        audio = np.concatenate([part for clip in clips for part in (clip, gap)])
+        segments, _ = self.batched.transcribe(audio, language="en", beam_size=BEAM_SIZE, clip_timestamps=spans, batch_size=len(clips))
+        texts = [[] for _ in clips]
+        for seg in segments: texts[max(0, bisect.bisect_right(starts, seg.start + 1e-3) - 1)].append(seg.text)
+        return ["".join(t).strip() for t in texts]
+
+
+class DualCapture:
+    def __init__(self, them_index, me_index):
+        self.on_recording_stop = None                      # same hooks the HUD sets on RealtimeSTT
+        self.on_realtime_transcription_stabilized = None   # no realtime partials here: no speculation
+        self.on_me = None                                  # on_me(text) for the rep's own words
+        self.on_recorded_chunk = None                      # input meters: THEM like RealtimeSTT, plus ME
+        self.on_me_chunk = None
+        self.post_speech_silence_duration = POST_SPEECH_SILENCE
+        self.texts = queue.Queue()
+        self.started = time.perf_counter()
+        self.transcriber = SharedTranscriber(self._on_text)
+        self.channels = [
+            Channel("THEM", them_index, self.transcriber.submit, self._speech_end),
+            Channel("ME", me_index, self.transcriber.submit),
+        ]
+        self.channels[0].on_chunk = lambda chunk: self.on_recorded_chunk and self.on_recorded_chunk(chunk)
+        self.channels[1].on_chunk = lambda chunk: self.on_me_chunk and self.on_me_chunk(chunk)
+        for channel in self.channels: channel.start()
+
+    def text(self):
+        """Blocks for the next [THEM] utterance, like AudioToTextRecorder.text()."""
+        return self.texts.get()
+
+    def shutdown(self):
+        for channel in self.channels: channel.stopping = True
+
+    def _speech_end(self):
+        if self.on_recording_stop: self.on_recording_stop()
+
+    def _on_text(self, speaker, text):
+        if speaker == "THEM": self.texts.put(text)
+        elif self.on_me: self.on_me(text)
+        else: log.info("[ME]: %s", text)
+
+    def summary(self):
+        wall = time.perf_counter() - self.started
+        s = self.transcriber.stats
+        capture = sum(c.cpu for c in self.channels)
+        rtf = s["busy_s"] / s["audio_s"] if s["audio_s"] else 0.0
+        per_batch = s["utterances"] / s["batches"] if s["batches"] else 0.0
+        return (f"capture+VAD {capture / wall:.1%} of a core, STT {s['cpu_s'] / wall:.2f} cores avg "
+                f"(duty {self.transcriber.duty():.0%}, RTF {rtf:.2f}), {s['utterances']} utterances in "
+                f"{s['batches']} batches ({per_batch:.1f}/batch), {s['me_skipped']} [ME] skipped")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: python dual_capture.py THEM_INDEX ME_INDEX [seconds]")
+        sys.exit(1)
+    applog.setup()
+    capture = DualCapture(int(sys.argv[1]), int(sys.argv[2]))
+    capture.on_me = lambda text: print(f"[ME]: {text}")
+
+    def print_them():
+        while True: print(f"[THEM]: {capture.text()}")
+
+    threading.Thread(target=print_them, daemon=True).start()
+    deadline = time.perf_counter() + (float(sys.argv[3]) if len(sys.argv) > 3 else 60)
+    while time.perf_counter() < deadline:
+        time.sleep(10)
+        print(f"CAPTURE: {capture.summary()}")
+    capture.shutdown()
@@ -1,5 +1,7 @@
 import pyaudio
 import time
+import devices
+from metering import levels, dbfs, SILENT_DBFS
 
 def test_microphone():
     p = pyaudio.PyAudio()
@@ -7,15 +9,9 @@ def test_microphone():
 
     # 1. List all devices
     valid_devices = []
-    for i in range(p.get_device_count()):
-        try:
-            info = p.get_device_info_by_index(i)
-            # We only care about INPUT devices (Microphones)
-            if info['maxInputChannels'] > 0:
-                print(f"Index {i}: {info['name']}")
-                valid_devices.append(i)
-        except:
-            pass
+    for i, name, _, _ in devices.list_inputs(p):
+        print(f"Index {i}: {name}")
+        valid_devices.append(i)
 
     # 2. Ask user to test a specific one
     print("\n--------------------------------")
@@ -30,16 +26,14 @@ def test_microphone():
 
         while True:
             data = stream.read(1024, exception_on_overflow=False)
-            # Convert byte data to integer peak volume
-            peak = max(data)
+            # Peak of the 16-bit samples in dBFS
+            peak_db = dbfs(levels(data)[1])
 
-            # Visual Bar
-            # The 'peak' value usually ranges from 0 to 255 for 8-bit, or higher for 16-bit.
-            # We normalize it for the visual bar.
-            bar_length = int(peak / 100)  # Adjust divisor if sensitivity is off
+            # Visual Bar: SILENT_DBFS..0 dB across 50 columns
+            bar_length = int(max(0.0, peak_db - SILENT_DBFS) / -SILENT_DBFS * 50)
             if bar_length > 50: bar_length = 50
 
-            print(f"\rLevel: {'|' * bar_length}".ljust(60), end="")
+            print(f"\rLevel: {'|' * bar_length:<50} {peak_db:6.1f} dBFS".ljust(70), end="")
 
     except Exception as e:
         print(f"\nError: {e}")
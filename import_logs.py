@@ -0,0 +1,46 @@
+import glob
+import os
+import sys
+import time
+import psycopg2
+from dotenv import load_dotenv
+import backend
+
+# --- BULK IMPORT: logs/call_*.txt -> leads / calls ---
+# Usage: python import_logs.py [glob]   (default: logs/call_*.txt)
+# One connection, one transaction, COPY-based. Safe to re-run: calls already imported are skipped.
+
+load_dotenv()
+
+def main():
+    pattern = sys.argv[1] if len(sys.argv) > 1 else os.path.join("logs", "call_*.txt")
+    paths = sorted(glob.glob(pattern))
+    if not paths:
+        print(f"❌ No call logs match '{pattern}'.")
+        return
+
+    db_url = os.getenv("DATABASE_URL")
+    if not db_url:
+        print("❌ DATABASE_URL is not set (.env).")
+        return
+
+    started = time.perf_counter()
+    calls = []
+    for path in paths:
+        try: calls.append(backend.parse_call_log(path))
+        except Exception as e: print(f"⚠️ SKIPPED {path}: {e}")
+    parsed = time.perf_counter()
+
+    conn = psycopg2.connect(db_url)
+    try:
+        merged = backend.ensure_schema(conn)
+        if merged: print(f"🔀 MERGED {merged} duplicate lead(s) before adding the email index.")
+        imported = backend.bulk_import_calls(conn, calls)
+    finally: conn.close()
+    done = time.perf_counter()
+
+    print(f"✅ IMPORTED {imported} new call(s) from {len(paths)} file(s) "
+          f"(parse {parsed - started:.2f}s, database {done - parsed:.2f}s).")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+import glob
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+# --- CALL JOURNAL ---
+# Every final utterance, cue and note is appended to a JSONL file the moment it arrives.
+# Lines are flushed to the OS immediately (survives an app crash) and fsync'd in batches by
+# a background thread (survives a power cut, at most FSYNC_INTERVAL behind). A journal with
+# no "saved" record is an unsaved call and is offered back on the next start. Lines heard
+# before a mission was picked go to a NONE journal: never offered, deleted after NONE_EXPIRY_S.
+
+JOURNAL_DIR = os.path.join("logs", "journal")
+FSYNC_INTERVAL = 0.5
+NONE_EXPIRY_S = 24 * 3600
+
+
+class CallJournal:
+    def __init__(self, directory=JOURNAL_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.lock = threading.Lock()
+        self.file = None
+        self.path = None
+        self.mission = None
+        self.utterances = []
+        self.cues = []
+        self.notes = []
+        self.saved = False
+        self.dirty = False
+        threading.Thread(target=self._fsync_loop, daemon=True).start()
+
+    def start(self, mission):
+        """Begins a new call file. The previous one is closed as-is (saved or not)."""
+        with self.lock: self._start(mission)
+
+    def resume(self, record):
+        """Re-opens a recovered journal so the call carries on in the same file."""
+        with self.lock:
+            previous, empty = self.path, not (self.utterances or self.cues or self.notes)
+            self._close_file()
+            # The file start() opened for this session (loading the mission) holds nothing the recovered one doesn't
+            if previous and previous != record["path"] and empty and os.path.exists(previous): os.remove(previous)
+            self.path = record["path"]
+            torn = False
+            with open(self.path, "rb") as f:
+                if f.seek(0, os.SEEK_END) > 0:
+                    f.seek(-1, os.SEEK_END)
+                    torn = f.read(1) != b"\n"
+            self.file = open(self.path, "a", encoding="utf-8")
+            if torn: self.file.write("\n")  # keep the next entry off the half-written line
+            self.mission = record["mission"]
+            self.utterances, self.cues, self.notes = list(record["utterances"]), list(record["cues"]), list(record["notes"])
+            self.saved = False
+
+    def append(self, kind, text):
+        """kind is "them", "me" (dual capture), "cue" or "note"."""
+        with self.lock:
+            if not self.file: self._start("NONE")
+            if kind == "me": self.utterances.append(f"[ME]: {text}")
+            else: {"them": self.utterances, "cue": self.cues, "note": self.notes}[kind].append(text)
+            self.saved = False
+            self._write({"type": kind, "text": text})
+
+    def mark_saved(self):
+        with self.lock:
+            if not self.file: return
+            self.saved = True
+            self._write({"type": "saved"})
+            os.fsync(self.file.fileno())
+            self.dirty = False
+
+    def transcript(self):
+        with self.lock: return "\n".join(self.utterances)
+
+    def close(self):
+        with self.lock: self._close_file()
+
+    def _start(self, mission):
+        """Caller holds the lock."""
+        self._close_file()
+        stamp = datetime.now().strftime("%Y-%m-%d_%H%M%S")
+        self.path = os.path.join(self.directory, f"call_{mission}_{stamp}.jsonl")
+        self.file = open(self.path, "a", encoding="utf-8")
+        self.mission = mission
+        self.utterances, self.cues, self.notes = [], [], []
+        self.saved = False
+        self._write({"type": "start", "mission": mission})
+
+    def _write(self, entry):
+        """Caller holds the lock."""
+        entry["t"] = time.time()
+        self.file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self.file.flush()
+        self.dirty = True
+
+    def _close_file(self):
+        if self.file:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.file.close()
+        self.file = None
+        self.dirty = False
+
+    def _fsync_loop(self):
+        while True:
+            time.sleep(FSYNC_INTERVAL)
+            with self.lock:
+                if self.file and self.dirty:
+                    os.fsync(self.file.fileno())
+                    self.dirty = False
+
+
+def read_journal(path):
+    """Replays one journal file. A torn last line (crash mid-write) is skipped.
+    "utterances" are the journal's transcript lines; "lines" keeps each one's speaker: [("them"/"me", text)]."""
+    record = {"path": path, "mission": "NONE", "utterances": [], "lines": [], "cues": [], "notes": [], "saved": False}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try: entry = json.loads(line)
+            except ValueError: continue
+            kind = entry.get("type")
+            if kind == "start": record["mission"] = entry.get("mission", "NONE")
+            elif kind == "them": record["utterances"].append(entry["text"])
+            elif kind == "me": record["utterances"].append(f"[ME]: {entry['text']}")
+            if kind in ("them", "me"): record["lines"].append((kind, entry["text"]))
+            elif kind == "cue": record["cues"].append(entry["text"])
+            elif kind == "note": record["notes"].append(entry["text"])
+            if kind in ("saved", "dismissed"): record["saved"] = True
+            elif kind in ("them", "me", "cue", "note"): record["saved"] = False
+    return record
+
+
+def dismiss(record):
+    """Marks a recovered call as handled so it isn't offered again."""
+    with open(record["path"], "a", encoding="utf-8") as f:
+        f.write(json.dumps({"type": "dismissed", "t": time.time()}) + "\n")
+
+
+def recover_unsaved(directory=JOURNAL_DIR):
+    """Unsaved calls that actually have content, newest last. Reads every journal: call it off the Tk thread."""
+    records = []
+    for path in sorted(glob.glob(os.path.join(directory, "call_*.jsonl")), key=os.path.getmtime):
+        if os.path.basename(path).startswith("call_NONE_"):
+            try:
+                if time.time() - os.path.getmtime(path) > NONE_EXPIRY_S: os.remove(path)
+            except OSError: pass
+            continue
+        records.append(read_journal(path))
+    return [r for r in records if not r["saved"] and (r["utterances"] or r["notes"])]
@@ -0,0 +1,44 @@
+import importlib
+import threading
+import time
+
+# --- LAZY IMPORTS ---
+# torch (via RealtimeSTT), openai, psycopg2 and pyaudio cost seconds to import but aren't
+# needed until a call actually starts. `psycopg2 = lazy("psycopg2")` gives a stand-in that
+# imports the real module on first attribute access and records how long that took.
+
+_lock = threading.Lock()
+IMPORT_TIMES = {}  # module name -> seconds spent importing it on first use
+
+
+class LazyModule:
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            with _lock:
+                if self._module is None:
+                    started = time.perf_counter()
+                    module = importlib.import_module(self._name)
+                    IMPORT_TIMES[self._name] = time.perf_counter() - started
+                    self._module = module
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def lazy(name):
+    return LazyModule(name)
+
+
+def report():
+    """One line per lazily imported module, slowest first."""
+    if not IMPORT_TIMES: return "no lazy imports yet"
+    return ", ".join(f"{name} {secs:.2f}s" for name, secs in sorted(IMPORT_TIMES.items(), key=lambda kv: -kv[1]))
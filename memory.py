@@ -0,0 +1,121 @@
+import threading
+import time
+from functools import lru_cache
+import applog
+
+log = applog.get("memory")
+
+# --- CONVERSATION MEMORY ---
+# Recent turns stay verbatim; once the history outgrows its token budget the oldest
+# turns are folded into a running summary on a background thread, so the hot path
+# (_run_ai) never waits on summarization. Folding happens in large chunks, which
+# keeps the message prefix stable between folds for provider-side prompt caching.
+# A failed fold backs off (BACKOFF_START doubling up to BACKOFF_MAX) instead of
+# re-firing the summarizer on every turn while the API is down.
+
+PROMPT_TOKEN_BUDGET = 3000   # system prompt + summary + verbatim turns
+FOLD_AT = 0.9                # start folding when history reaches 90% of what's left for it
+FOLD_DOWN_TO = 0.5           # ...and fold until the verbatim turns fit in 50% of it
+MIN_RECENT_TURNS = 6         # never fold the last few turns, the model needs them word for word
+BACKOFF_START = 5.0          # seconds before retrying after a failed fold...
+BACKOFF_MAX = 120.0          # ...doubling per consecutive failure, up to this
+
+_encoding = None
+
+
+def _get_encoding():
+    """Loads tiktoken on the first count, not at import (it reads a large BPE file)."""
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("o200k_base")
+        except Exception:
+            _encoding = False
+    return _encoding
+
+
+@lru_cache(maxsize=256)
+def count_tokens(text):
+    """Exact count with tiktoken when installed, otherwise the usual ~4 chars/token estimate."""
+    encoding = _get_encoding()
+    if encoding: return len(encoding.encode(text))
+    return max(1, len(text) // 4)
+
+
+class ConversationMemory:
+    def __init__(self, summarize, budget=PROMPT_TOKEN_BUDGET):
+        self.summarize = summarize  # summarize(previous_summary, lines) -> new summary text
+        self.budget = budget
+        self.lock = threading.Lock()
+        self.turns = []  # [(line, tokens)] oldest first
+        self.summary = ""
+        self.folding = False
+        self.generation = 0  # bumped by clear() so a late summary can't leak into a new call
+        self.reserved = 0    # tokens taken by the system prompt on the last request
+        self.failures = 0    # consecutive failed folds
+        self.retry_at = 0.0  # time.monotonic() before which no fold starts
+
+    def append(self, line):
+        with self.lock:
+            self.turns.append((line, count_tokens(line)))
+            self._maybe_fold()
+
+    def clear(self):
+        with self.lock:
+            self.turns = []
+            self.summary = ""
+            self.folding = False
+            self.failures, self.retry_at = 0, 0.0
+            self.generation += 1
+
+    def lines(self, reserved_text=""):
+        """History lines for the prompt, summary first, trimmed to fit beside `reserved_text`."""
+        with self.lock:
+            self.reserved = count_tokens(reserved_text) if reserved_text else 0
+            room = self.budget - self.reserved
+            head = [f"[SUMMARY OF EARLIER CALL]: {self.summary}"] if self.summary else []
+            room -= sum(count_tokens(h) for h in head)
+            recent = []
+            for line, tokens in reversed(self.turns):
+                # A fold is running or failed: hide the oldest turns rather than blow the budget
+                if recent and tokens > room: break
+                recent.append(line)
+                room -= tokens
+            self._maybe_fold()
+            return head + recent[::-1]
+
+    def _maybe_fold(self):
+        """Caller holds the lock."""
+        room = self.budget - self.reserved - (count_tokens(self.summary) if self.summary else 0)
+        used = sum(t for _, t in self.turns)
+        if self.folding or used <= room * FOLD_AT or len(self.turns) <= MIN_RECENT_TURNS: return
+        if time.monotonic() < self.retry_at: return
+        n = 0
+        while n < len(self.turns) - MIN_RECENT_TURNS and used > room * FOLD_DOWN_TO:
+            used -= self.turns[n][1]
+            n += 1
+        if not n: return
+        self.folding = True
+        batch = [line for line, _ in self.turns[:n]]
+        threading.Thread(target=self._fold, args=(self.generation, self.summary, batch), daemon=True).start()
+
+    def _fold(self, generation, summary, batch):
+        try:
+            new_summary = self.summarize(summary, batch).strip()
+        except Exception as e:
+            log.error("MEMORY ERROR: Summary failed (%s). Oldest turns will be trimmed instead.", e)
+            new_summary = None
+        with self.lock:
+            if generation != self.generation: return
+            self.folding = False
+            if new_summary:
+                self.summary = new_summary
+                del self.turns[:len(batch)]
+                self.failures, self.retry_at = 0, 0.0
+                log.debug("Folded %d turns into summary (%d tokens).", len(batch), count_tokens(new_summary))
+            else:
+                backoff = min(BACKOFF_START * 2 ** self.failures, BACKOFF_MAX)
+                self.failures += 1
+                self.retry_at = time.monotonic() + backoff
+                log.warning("⚠️ MEMORY: fold %d failed, next try in %.0fs.", self.failures, backoff)
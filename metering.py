@@ -0,0 +1,72 @@
+import collections
+import math
+import threading
+from lazy import lazy
+
+np = lazy("numpy")  # metering is imported by the HUD; numpy isn't needed until audio flows
+
+# --- AUDIO METERING ---
+# Levels for 16-bit PCM buffers, vectorized over a zero-copy np.frombuffer view (no
+# struct.unpack, no per-sample Python). A Meter keeps a rolling noise floor and flags a
+# channel that is dead (digital zeros), silent (nothing above SILENT_DBFS) or clipping.
+# Meter.update() runs on the audio thread; the HUD polls snapshot() at its own frame rate.
+
+FULL_SCALE = 32768.0
+CLIP_LEVEL = 32700          # |sample| at or above this counts as clipped
+FLOOR_DB = -96.0            # reported for all-zero buffers
+FLOOR_RISE_DB = 0.05        # per buffer: the floor drops instantly, creeps back up slowly
+DEAD_SECONDS = 2.0          # this long of pure digital zeros = dead channel
+SILENT_DBFS = -60.0         # ...or of nothing louder than this = silent channel
+PEAK_HOLD_BUFFERS = 30
+
+
+def levels(data):
+    """(rms, peak, clipped samples) for a bytes-like buffer of int16 PCM. rms/peak are 0..1 of full scale."""
+    x = np.frombuffer(data, dtype=np.int16)
+    if not x.size: return 0.0, 0.0, 0
+    f = x.astype(np.float32)
+    rms = math.sqrt(float(np.dot(f, f)) / x.size) / FULL_SCALE
+    hi, lo = int(x.max()), int(x.min())
+    peak = max(hi, -lo) / FULL_SCALE
+    clipped = int(np.count_nonzero((x >= CLIP_LEVEL) | (x <= -CLIP_LEVEL))) if max(hi, -lo) >= CLIP_LEVEL else 0
+    return rms, peak, clipped
+
+
+def dbfs(level):
+    return 20 * math.log10(level) if level > 0 else FLOOR_DB
+
+
+class Meter:
+    def __init__(self, rate=16000):
+        self.rate = rate
+        self.lock = threading.Lock()
+        self.rms_db = FLOOR_DB
+        self.peak_db = FLOOR_DB
+        self.floor_db = None
+        self.clipped = 0           # clipped samples seen so far
+        self.holds = collections.deque(maxlen=PEAK_HOLD_BUFFERS)
+        self.dead_s = 0.0          # running length of all-zero audio
+        self.silent_s = 0.0        # running length of audio below SILENT_DBFS
+
+    def update(self, data):
+        rms, peak, clipped = levels(data)
+        seconds = memoryview(data).nbytes / 2 / self.rate
+        rms_db, peak_db = dbfs(rms), dbfs(peak)
+        with self.lock:
+            self.rms_db, self.peak_db = rms_db, peak_db
+            self.holds.append(peak_db)
+            self.clipped += clipped
+            if peak > 0:  # digital zeros say nothing about the room's noise floor
+                self.floor_db = rms_db if self.floor_db is None else min(rms_db, self.floor_db + FLOOR_RISE_DB)
+            self.dead_s = self.dead_s + seconds if peak == 0 else 0.0
+            self.silent_s = self.silent_s + seconds if peak_db < SILENT_DBFS else 0.0
+
+    def snapshot(self):
+        """{"rms_db", "peak_db", "hold_db", "floor_db", "clipped", "status"} for display."""
+        with self.lock:
+            if self.dead_s >= DEAD_SECONDS: status = "DEAD"
+            elif self.silent_s >= DEAD_SECONDS: status = "SILENT"
+            elif self.holds and max(self.holds) >= dbfs(CLIP_LEVEL / FULL_SCALE): status = "CLIPPING"
+            else: status = "OK"
+            return {"rms_db": self.rms_db, "peak_db": self.peak_db, "hold_db": max(self.holds, default=FLOOR_DB),
+                    "floor_db": self.floor_db if self.floor_db is not None else FLOOR_DB, "clipped": self.clipped, "status": status}
@@ -2,6 +2,7 @@ import pyaudio
 import os
 import sys
 from dotenv import load_dotenv
+from metering import levels, dbfs, SILENT_DBFS
 
 load_dotenv()
 DEVICE_INDEX = int(os.getenv("DEVICE_INDEX", 11))
@@ -24,15 +25,15 @@ def main():
 
         while True:
             data = stream.read(1024, exception_on_overflow=False)
-            # Calculate simple volume peak
-            peak = max(data) 
+            # Peak level in dBFS (max(data) only saw single bytes)
+            peak_db = dbfs(levels(data)[1])
             
-            # visual bar
-            bars = "|" * int(peak / 250)
+            # visual bar, SILENT_DBFS..0 dB across 50 columns
+            bars = "|" * int(max(0.0, peak_db - SILENT_DBFS) / -SILENT_DBFS * 50)
             if len(bars) > 0:
-                print(f"\rVOLUME: {bars[:50]}", end="")
+                print(f"\rVOLUME: {bars[:50]:<50} {peak_db:6.1f} dBFS", end="")
             else:
-                print(f"\rVOLUME: (Silence)", end="")
+                print(f"\rVOLUME: (Silence)".ljust(68), end="")
                 
     except Exception as e:
         print(f"\nERROR: {e}")
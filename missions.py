@@ -0,0 +1,227 @@
+import glob
+import os
+import re
+import threading
+from cue_cache import normalize
+
+# --- MISSIONS ---
+# Mission files are compiled once into stages, IF branches and key numbers, and cached by
+# path until the file changes. The prompt gets the mission header, the current stage with
+# all of its branches, and the next stage (so the AI can move the call on) instead of the
+# whole file; numbers quoted in the other stages ride along as KEY NUMBERS so they're never
+# dropped. A StageTracker follows the call by matching cues and the rep's own lines against
+# each stage's words. Any mission*.txt in MISSION_DIR shows up in the HUD menu.
+#
+#   # MISSION: SELL DRONES TO FARMERS        <- header: everything before the first stage
+#   # --- STAGE 1: THE OPENER ---
+#   - "Hi, this is Josh..."                  <- stage line
+#   - IF they hire a plane:                  <- branch, with its indented lines
+#     - "Got it. ..."
+
+MISSION_DIR = os.getenv("MISSION_DIR", ".")
+MISSION_GLOB = "mission*.txt"
+MATCH_SCORE = 0.3        # share of a cue's words found in a stage to move there
+BACK_SCORE = 0.6         # ...and the (higher) share needed to move back to an earlier stage
+
+STAGE_RE = re.compile(r"^#?\s*-{3}\s*STAGE\s*(\d+)\s*:?\s*(.*?)\s*-*\s*$", re.I)
+SECTION_RE = re.compile(r"^#?\s*-{3}\s*(.+?)\s*-{3}\s*$")
+IF_RE = re.compile(r"^-\s*IF\b\s*(.*?):?\s*$", re.I)
+ITEM_RE = re.compile(r"^(\s*)-\s*(.+)$")
+FIELD_RE = re.compile(r"^#?\s*(MISSION|TARGET|YOUR ROLE|GOAL)\s*:\s*(.+)$", re.I)
+NUMBER_RE = re.compile(r"(?<!\w)\d[\d,.]*(?![A-Za-z])")  # 2,000 / $1.50 / 20% - not the 50 in "T50" or a "3D"
+LIST_RE = re.compile(r"^\s*(?:[-#]+\s*|\d+\.\s+)*")
+SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+TRUNCATED_RE = re.compile(r"(?<![\w$£€])[.,]\d")  # ".50/acre", ",000 CAD": the digits/currency before it got lost
+
+_cache = {}  # path -> (mtime_ns, size, Mission)
+_lock = threading.Lock()
+
+
+class MissionError(ValueError):
+    pass
+
+
+class Stage:
+    def __init__(self, number, title):
+        self.number = number    # str, same as the cue cache's stage key
+        self.title = title
+        self.goal = None
+        self.lines = []
+        self.branches = []      # [(condition, [lines])]
+        self.raw = []           # the stage's own text, as written
+        self.words = set()
+
+    @property
+    def text(self): return "\n".join(self.raw).strip()
+
+
+class Mission:
+    def __init__(self, name, path=None):
+        self.name = name
+        self.path = path
+        self.fields = {}        # MISSION / TARGET / YOUR ROLE / GOAL from the header
+        self.header = ""
+        self.stages = []
+        self.numbers = []       # [(stage number or None for the header, sentence)]
+        self.warnings = []
+        self.text = ""
+        self._prompts = {}
+
+    @property
+    def label(self): return self.fields.get("MISSION", self.name.replace("_", " "))
+
+    def stage(self, number):
+        for stage in self.stages:
+            if stage.number == number: return stage
+        return None
+
+    def opener(self):
+        """First line of the first stage, for the cue panel before the call starts."""
+        return self.stages[0].lines[0] if self.stages and self.stages[0].lines else None
+
+    def prompt(self, number):
+        """Mission text for the prompt at this stage (built once per stage)."""
+        if not self.stages: return self.text
+        if number not in self._prompts:
+            index = next((i for i, s in enumerate(self.stages) if s.number == number), 0)
+            shown = self.stages[index:index + 2]
+            parts = [self.header]
+            numbers = [n for stage, n in self.numbers if stage is not None and stage not in {s.number for s in shown}]
+            if numbers: parts.append("# --- KEY NUMBERS (quote exactly) ---\n" + "\n".join(f"- {n}" for n in numbers))
+            parts.append("# --- STAGES ---\n" + " | ".join(f"{s.number}: {s.title}" for s in self.stages))
+            parts.append(f"# --- CURRENT STAGE {shown[0].number}: {shown[0].title} ---\n" + body(shown[0]))
+            if len(shown) > 1: parts.append(f"# --- NEXT STAGE {shown[1].number}: {shown[1].title} ---\n" + body(shown[1]))
+            self._prompts[number] = "\n\n".join(p for p in parts if p)
+        return self._prompts[number]
+
+
+def body(stage):
+    return "\n".join(stage.raw[1:]).strip()
+
+
+def mission_name(path):
+    """mission_sell_drones.txt -> SELL_DRONES (the name calls are saved and journaled under)."""
+    base = os.path.splitext(os.path.basename(path))[0]
+    return (base[len("mission_"):] if base.lower().startswith("mission_") else base).upper()
+
+
+def parse(text, name, path=None):
+    """Compiles mission text. Raises MissionError for files the HUD can't use; softer problems go in .warnings."""
+    mission = Mission(name, path)
+    mission.text = text.lstrip("\ufeff").strip()
+    if not mission.text: raise MissionError(f"{name}: mission file is empty")
+    header, stage, branch = [], None, None
+    for n, line in enumerate(mission.text.splitlines(), 1):
+        match = STAGE_RE.match(line.strip())
+        if match:
+            number = match.group(1)
+            if mission.stage(number): raise MissionError(f"{name}: line {n}: STAGE {number} defined twice")
+            stage, branch = Stage(number, match.group(2).strip(" -") or f"STAGE {number}"), None
+            mission.stages.append(stage)
+            stage.raw.append(line)
+            continue
+        if stage is None:
+            header.append(line)
+            field = FIELD_RE.match(line.strip())
+            if field and field.group(1).upper() not in mission.fields: mission.fields[field.group(1).upper()] = field.group(2).strip()
+            continue
+        if SECTION_RE.match(line.strip()):  # a non-stage section after the stages ends the last stage
+            header.append(line)
+            stage = branch = None
+            continue
+        stage.raw.append(line)
+        item = ITEM_RE.match(line)
+        if not item:
+            if line.strip().upper().startswith("GOAL:"): stage.goal = line.split(":", 1)[1].strip()
+            continue
+        indent, content = item.group(1), item.group(2).strip()
+        condition = IF_RE.match(f"- {content}") if not indent else None
+        if condition:
+            branch = (condition.group(1), [])
+            stage.branches.append(branch)
+        elif indent and branch: branch[1].append(content)
+        else:
+            branch = None
+            stage.lines.append(content)
+    mission.header = "\n".join(header).strip()
+    validate(mission)
+    for stage in mission.stages:
+        stage.words = set(normalize(stage.text).split())
+    for stage_number, source in [(None, mission.header)] + [(s.number, body(s)) for s in mission.stages]:
+        for line in source.splitlines():
+            for sentence in SENTENCE_RE.split(LIST_RE.sub("", line).strip('" ')):
+                sentence = sentence.strip('" ')
+                if NUMBER_RE.search(sentence) and (stage_number, sentence) not in mission.numbers: mission.numbers.append((stage_number, sentence))
+    return mission
+
+
+def validate(mission):
+    name = mission.name
+    for stage in mission.stages:
+        if not stage.lines and not stage.branches: raise MissionError(f"{name}: STAGE {stage.number} has no lines")
+        for condition, lines in stage.branches:
+            if not lines: raise MissionError(f"{name}: STAGE {stage.number}: 'IF {condition}' has no indented lines under it")
+    if not mission.stages: mission.warnings.append("no '# --- STAGE n' sections: the whole file goes into every prompt")
+    elif [s.number for s in mission.stages] != [str(i) for i in range(1, len(mission.stages) + 1)]:
+        mission.warnings.append("stages aren't numbered 1, 2, 3... in order")
+    if mission.stages and "GOAL" not in mission.fields: mission.warnings.append("no '# GOAL:' line in the header")
+    for n, line in enumerate(mission.text.splitlines(), 1):
+        if TRUNCATED_RE.search(line): mission.warnings.append(f"line {n}: number looks truncated (lost '$'?): {line.strip()[:60]}")
+
+
+def load(path):
+    """Compiled Mission for a file, from the cache unless the file changed since."""
+    try: st = os.stat(path)
+    except OSError as e: raise MissionError(f"{path}: {e.strerror}")
+    with _lock:
+        cached = _cache.get(path)
+        if cached and cached[:2] == (st.st_mtime_ns, st.st_size): return cached[2]
+    try:
+        with open(path, "r", encoding="utf-8-sig") as f: text = f.read()
+    except (OSError, UnicodeDecodeError) as e: raise MissionError(f"{path}: can't read mission file: {e}")
+    mission = parse(text, mission_name(path), path)
+    with _lock: _cache[path] = (st.st_mtime_ns, st.st_size, mission)
+    return mission
+
+
+def discover(directory=MISSION_DIR):
+    """[(path, Mission or MissionError)] for every mission file in the directory, sorted by path."""
+    found = []
+    for path in sorted(glob.glob(os.path.join(directory, MISSION_GLOB))):
+        try: found.append((path, load(path)))
+        except MissionError as e: found.append((path, e))
+    return found
+
+
+def find(name, directory=MISSION_DIR):
+    """Path of the mission saved under `name` (e.g. "SELL_DRONES"), or None."""
+    for path in sorted(glob.glob(os.path.join(directory, MISSION_GLOB))):
+        if mission_name(path) == name.upper(): return path
+    return None
+
+
+class StageTracker:
+    """Follows the call through the mission's stages. observe() takes cues and the rep's own lines."""
+    def __init__(self, mission=None):
+        self.mission = mission
+        self.current = mission.stages[0].number if mission and mission.stages else "1"
+
+    @property
+    def upcoming(self):
+        """The stage after the current one, or None."""
+        order = [s.number for s in self.mission.stages] if self.mission else []
+        i = order.index(self.current) if self.current in order else len(order)
+        return order[i + 1] if i + 1 < len(order) else None
+
+    def observe(self, text):
+        if not self.mission or not self.mission.stages: return self.current
+        words = set(normalize(text).split())
+        if not words: return self.current
+        order = [s.number for s in self.mission.stages]
+        here = order.index(self.current) if self.current in order else 0
+        best, best_score = self.current, 0.0
+        for i, stage in enumerate(self.mission.stages):
+            score = len(words & stage.words) / len(words)
+            if score >= (BACK_SCORE if i < here else MATCH_SCORE) and score > best_score: best, best_score = stage.number, score
+        self.current = best
+        return best
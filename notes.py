@@ -0,0 +1,53 @@
+import re
+import applog
+
+log = applog.get("notes")
+
+# --- NOTE STORE ---
+# [NOTE] lines from the AI, deduplicated through a normalized-key index (O(1) per note
+# instead of rescanning every note), kept in arrival order so saved summaries are
+# deterministic, with the lead fields the save dialog needs kept in their own slots.
+
+FIELDS = ("email", "name", "phone", "status")
+
+
+def note_key(line):
+    return re.sub(r'\W+', '', line).lower()
+
+
+def field_for(key):
+    """Maps a note's key ("Email", "Contact Name", "Phone Number"...) to a lead field, or None."""
+    key = key.lower()
+    if "email" in key or "e-mail" in key: return "email"
+    if "name" in key and "mission" not in key: return "name"
+    if "phone" in key or key in ("number", "cell", "mobile"): return "phone"
+    if "status" in key or "outcome" in key: return "status"
+    return None
+
+
+class NoteStore:
+    def __init__(self):
+        self.index = {}  # normalized key -> note, in arrival order
+        self.fields = dict.fromkeys(FIELDS, "")
+        self.conflicts = []  # (field, old value, new value)
+
+    def __iter__(self): return iter(self.index.values())
+    def __len__(self): return len(self.index)
+    def __contains__(self, line): return note_key(line) in self.index
+
+    def add(self, line):
+        """Stores a note; returns False if an equivalent one is already there."""
+        line = line.strip()
+        key = note_key(line)
+        if not key or key in self.index: return False
+        self.index[key] = line
+        if ":" in line:
+            k, v = line.split(":", 1)
+            field, value = field_for(k), v.strip()
+            if field and value:
+                old = self.fields[field]
+                if old and old != value:
+                    self.conflicts.append((field, old, value))
+                    log.warning("⚠️ NOTE CONFLICT: %s changed '%s' -> '%s'", field, old, value)
+                self.fields[field] = value
+        return True
@@ -0,0 +1,180 @@
+import glob
+import json
+import math
+import os
+import re
+import zlib
+from lazy import lazy
+from cue_cache import normalize, MIN_WORDS
+
+np = lazy("numpy")
+
+# --- LOCAL OBJECTION MATCHER ---
+# Most [THEM] lines are stock objections the mission's IF branches (or an earlier cue) already
+# answer. Each is indexed as a hashed TF-IDF vector (words, word pairs and character trigrams,
+# so "plain" still finds "plane") in one float32 matrix per mission. A final utterance is
+# hashed the same way and scored against every entry with one small matrix product, well under
+# a millisecond, so a confident match can go on screen as a provisional cue while gpt-4o runs.
+#
+# Entries come from the mission's branches, the cue cache's cues for the mission, and past
+# calls in logs/call_<MISSION>_*.txt and logs/journal/call_<MISSION>_*.jsonl (each [THEM] line
+# and the [ME] line that answered it). A logged answer only counts once MIN_LOG_CALLS calls
+# gave it, and each call's opening exchange is skipped: "Hello, this is Seed Farms" gets a
+# different reply on every call, and none of them is a cue.
+# Benchmark: python bench_objections.py
+
+DIM = 1 << 12            # hashed feature space; collisions are harmless at a few hundred entries
+MAX_ENTRIES = 500
+MATCH_SCORE = 0.5        # cosine similarity for a provisional cue...
+MATCH_MARGIN = 0.05      # ...and its lead over the best entry with a different cue
+STAGE_BONUS = 0.05       # entries from the current or next stage win close calls
+MIN_LOG_CALLS = 2        # calls that must have given (near enough) the same answer
+SAME_ANSWER = 0.6        # word-set similarity for "the same answer"
+OPENING_TURNS = 1        # the pick-up and the rep's greeting
+LOG_GLOB = os.path.join("logs", "call_{mission}_*.txt")
+JOURNAL_GLOB = os.path.join("logs", "journal", "call_{mission}_*.jsonl")
+REFUSALS = ("i'm sorry, i can't", "i am sorry, i can't", "as an ai")
+SPEAKER_RE = re.compile(r"^\[(ME|THEM)\]:\s*(.*)$")
+
+
+def features(text):
+    """{hashed feature: weight} for one piece of text."""
+    words = normalize(text).split()
+    grams = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    for w in words:
+        padded = f" {w} "
+        grams += [padded[i:i + 3] for i in range(len(padded) - 2)]
+    counts = {}
+    for g in grams:
+        h = zlib.crc32(g.encode("utf-8")) & (DIM - 1)
+        counts[h] = counts.get(h, 0) + 1
+    return {h: 1 + math.log(c) for h, c in counts.items()}
+
+
+def clean_cue(text):
+    return text.strip().strip('"').strip()
+
+
+class Match:
+    def __init__(self, score, cue, key, source, stage):
+        self.score = score
+        self.cue = cue
+        self.key = key          # the text that matched: an IF condition or a past utterance
+        self.source = source    # "branch" / "cache" / "log"
+        self.stage = stage
+
+    def __repr__(self):
+        return f"<Match {self.score:.2f} {self.source} stage {self.stage}: {self.cue[:40]!r}>"
+
+
+class ObjectionIndex:
+    def __init__(self):
+        self.entries = []       # (key text, cue, source, stage)
+        self.seen = set()
+        self.columns = None     # float32 [DIM x entries], entry vectors L2-normalized
+        self.idf = None
+        self.stages = None
+        self.cue_ids = None     # entries sharing a cue share an id, so they don't count as rivals
+        self.stats = {"queries": 0, "matches": 0, "skipped": 0}
+
+    def add(self, key, cue, source, stage=None):
+        cue = clean_cue(cue)
+        if not cue or cue.lower().startswith(REFUSALS) or len(normalize(key).split()) < MIN_WORDS: return
+        if (normalize(key), cue) in self.seen or len(self.entries) >= MAX_ENTRIES: return
+        self.seen.add((normalize(key), cue))
+        self.entries.append((key, cue, source, stage))
+
+    def add_mission(self, mission):
+        for stage in mission.stages:
+            for condition, lines in stage.branches:
+                self.add(condition, lines[0], "branch", stage.number)
+
+    def add_cache(self, cue_cache, mission_name):
+        """SCRIPT-mode cues only: like the branches and the logs, they're lines the rep can say as-is."""
+        for key, cue, stage in cue_cache.entries(mission_name, "SCRIPT", MAX_ENTRIES): self.add(key, cue, "cache", stage)
+
+    def add_logs(self, mission_name, paths=None):
+        if paths is None: paths = glob.glob(LOG_GLOB.format(mission=mission_name)) + glob.glob(JOURNAL_GLOB.format(mission=mission_name))
+        calls = [call_pairs(path)[OPENING_TURNS:] for path in paths]
+        answers = [(i, set(normalize(me).split())) for i, pairs in enumerate(calls) for _, me in pairs]
+        for pairs in calls:
+            for them, me in pairs:
+                words = set(normalize(me).split())
+                given_by = {i for i, other in answers if words | other and len(words & other) / len(words | other) >= SAME_ANSWER}
+                if len(given_by) >= MIN_LOG_CALLS: self.add(them, me, "log")
+
+    def build(self):
+        """Freezes the entries into the TF-IDF matrix. Call after the add_* calls."""
+        rows = [features(key) for key, _, _, _ in self.entries]
+        df = np.zeros(DIM, dtype=np.float32)
+        for row in rows: df[list(row)] += 1
+        self.idf = (np.log((1 + len(rows)) / (1 + df)) + 1).astype(np.float32)
+        matrix = np.zeros((len(rows), DIM), dtype=np.float32)
+        for i, row in enumerate(rows):
+            idx = np.fromiter(row, dtype=np.intp, count=len(row))
+            matrix[i, idx] = np.fromiter(row.values(), dtype=np.float32, count=len(row)) * self.idf[idx]
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.where(norms == 0, 1, norms)
+        self.columns = np.ascontiguousarray(matrix.T)  # a query gathers only the rows of its own features
+        self.stages = np.array([stage or "" for _, _, _, stage in self.entries], dtype=object)
+        cues = {}
+        self.cue_ids = np.array([cues.setdefault(cue, len(cues)) for _, cue, _, _ in self.entries], dtype=np.intp)
+        return self
+
+    def match(self, text, stage=None, next_stage=None):
+        """Best confident Match for a final utterance, or None."""
+        self.stats["queries"] += 1
+        if self.columns is None or not self.entries or len(normalize(text).split()) < MIN_WORDS:
+            self.stats["skipped"] += 1
+            return None
+        row = features(text)
+        idx = np.fromiter(row, dtype=np.intp, count=len(row))
+        q = np.fromiter(row.values(), dtype=np.float32, count=len(row)) * self.idf[idx]
+        scores = q @ self.columns[idx] / (np.linalg.norm(q) or 1.0)
+        if stage is not None: scores = scores + STAGE_BONUS * ((self.stages == stage) | (self.stages == next_stage))
+        best = int(np.argmax(scores))
+        rivals = scores[self.cue_ids != self.cue_ids[best]]
+        if scores[best] < MATCH_SCORE or (rivals.size and scores[best] - rivals.max() < MATCH_MARGIN): return None
+        self.stats["matches"] += 1
+        key, cue, source, entry_stage = self.entries[best]
+        return Match(float(scores[best]), cue, key, source, entry_stage)
+
+    def summary(self):
+        s = self.stats
+        return f"{len(self.entries)} entries, {s['matches']}/{s['queries']} utterances matched ({s['skipped']} too short)"
+
+
+def call_pairs(path):
+    """[(THEM line, the [ME] line right after it)] from a logs/call_*.txt file or a call journal."""
+    pairs, them = [], None
+    for speaker, text in journal_lines(path) if path.endswith(".jsonl") else log_lines(path):
+        if speaker == "THEM": them = text
+        elif them:
+            pairs.append((them, text))
+            them = None
+    return pairs
+
+
+def log_lines(path):
+    with open(path, "r", encoding="utf-8-sig") as f:
+        for line in f:
+            m = SPEAKER_RE.match(line.strip())
+            if m: yield m.group(1), m.group(2)
+
+
+def journal_lines(path):
+    """Journals only have [ME] lines with dual capture (REP_MIC_NAME); a torn last line is skipped."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try: entry = json.loads(line)
+            except ValueError: continue
+            if entry.get("type") in ("them", "me"): yield entry["type"].upper(), entry["text"]
+
+
+def build_index(mission, cue_cache=None, log_paths=None):
+    """Index for one mission: its branches, then cached cues, then past calls."""
+    index = ObjectionIndex()
+    index.add_mission(mission)
+    if cue_cache: index.add_cache(cue_cache, mission.name)
+    index.add_logs(mission.name, log_paths)
+    return index.build()
@@ -0,0 +1,46 @@
+import os
+import threading
+from datetime import datetime
+
+# --- PANEL ARCHIVE ---
+# Lines trimmed off the top of a HUD panel are appended here in blocks, so the Tk Text
+# widget only ever holds a bounded window. Blocks are read back when the rep scrolls up.
+# The file is only created on the first trim, so short calls leave nothing on disk.
+
+ARCHIVE_DIR = os.path.join("logs", "panels")
+
+
+class PanelArchive:
+    def __init__(self, name, directory=ARCHIVE_DIR):
+        self.name = name
+        self.directory = directory
+        self.path = None
+        self.file = None
+        self.lock = threading.Lock()
+        self.blocks = []  # (byte offset, byte length) per archived block, oldest first
+
+    def __len__(self): return len(self.blocks)
+
+    def append(self, text):
+        data = text.encode("utf-8")
+        with self.lock:
+            if self.file is None:
+                os.makedirs(self.directory, exist_ok=True)
+                stamp = datetime.now().strftime("%Y-%m-%d_%H%M%S")
+                self.path = os.path.join(self.directory, f"{self.name}_{stamp}.txt")
+                self.file = open(self.path, "a+b")
+            offset = self.file.seek(0, os.SEEK_END)
+            self.file.write(data)
+            self.file.flush()
+            self.blocks.append((offset, len(data)))
+
+    def read(self, index):
+        offset, length = self.blocks[index]
+        with self.lock:
+            self.file.seek(offset)
+            return self.file.read(length).decode("utf-8")
+
+    def close(self):
+        with self.lock:
+            if self.file: self.file.close()
+            self.file = None
@@ -0,0 +1,230 @@
+import threading
+from cue_cache import normalize
+
+# --- AI REQUEST SCHEDULER (LATEST WINS) ---
+# One place for all AI work: bursts of utterances are debounced into a single
+# request, a newer input makes any in-flight request stale, and only
+# `max_inflight` requests ever talk to the API at once.
+
+DEBOUNCE_SECONDS = 0.35
+MAX_INFLIGHT = 1
+DRAFT_MIN_WORDS = 4     # don't speculate on "yeah so" - too little to go on
+DRAFT_REGROW_WORDS = 3  # a final this close to the draft's partial still commits it
+MAX_DRAFTS = 2          # per utterance: one draft, plus one re-draft...
+REDRAFT_WORDS = 8       # ...only once the partial has grown this much
+DRAFT_SLOT_WAIT = 0.5   # a draft waits this long for an API slot, then gives up
+COMMIT_MATCH = 0.85     # word overlap between draft partial and final transcript to reuse the draft
+
+
+class AIJob:
+    speculative = False
+
+    def __init__(self, scheduler, seq, text):
+        self.scheduler = scheduler
+        self.seq = seq
+        self.text = text
+        self.emit = scheduler.emit
+        self.abandoned = False  # set by the worker when it actually bailed out on a stale job
+        self.stream = None
+
+    def attach(self, stream): self.stream = stream
+
+    @property
+    def stale(self):
+        """True once a newer input has been submitted; the worker should stop and drop its output."""
+        return self.seq != self.scheduler.latest_seq
+
+
+class AIScheduler:
+    def __init__(self, worker, emit, debounce=DEBOUNCE_SECONDS, max_inflight=MAX_INFLIGHT):
+        self.worker = worker  # called as worker(text, job) on a background thread
+        self.emit = emit      # where jobs send their GUI messages
+        self.debounce = debounce
+        self.lock = threading.Lock()
+        self.slots = threading.BoundedSemaphore(max_inflight)
+        self.pending = []
+        self.timer = None
+        self.latest_seq = 0
+        self.stats = {"submitted": 0, "coalesced": 0, "dispatched": 0, "dropped": 0, "cancelled": 0, "completed": 0}
+
+    def submit(self, text):
+        """Queues an utterance; it is sent once the prospect pauses for `debounce` seconds."""
+        with self.lock:
+            self.stats["submitted"] += 1
+            if self.pending: self.stats["coalesced"] += 1
+            self.pending.append(text)
+            self.latest_seq += 1
+            if self.timer: self.timer.cancel()
+            self.timer = threading.Timer(self.debounce, self._flush)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def flush_now(self, fallback_text):
+        """Sends whatever is pending right away, or `fallback_text` if nothing is."""
+        with self.lock:
+            self.stats["submitted"] += 1
+            if self.pending: self.stats["coalesced"] += 1
+            else: self.pending.append(fallback_text)
+            self.latest_seq += 1
+        self._flush()
+
+    def supersede(self):
+        """Marks everything in flight stale without sending anything new (a speculative draft won)."""
+        with self.lock:
+            if self.pending: return False
+            self.stats["submitted"] += 1
+            self.latest_seq += 1
+            return True
+
+    def _flush(self):
+        with self.lock:
+            if self.timer: self.timer.cancel()
+            self.timer = None
+            if not self.pending: return
+            job = AIJob(self, self.latest_seq, " ".join(self.pending))
+            self.pending = []
+            self.stats["dispatched"] += 1
+        threading.Thread(target=self._run, args=(job,), daemon=True).start()
+
+    def _run(self, job):
+        with self.slots:
+            if job.stale:
+                self._count("dropped")
+                return
+            try: self.worker(job.text, job)
+            finally: self._count("cancelled" if job.abandoned else "completed")
+
+    def run_draft(self, draft):
+        """Runs a speculative draft in one of the same `max_inflight` slots; it never queues long for one."""
+        def run():
+            if not self.slots.acquire(timeout=DRAFT_SLOT_WAIT): return draft.cancel()
+            try:
+                if not draft.stale: self.worker(draft.partial, draft)
+            finally: self.slots.release()
+        threading.Thread(target=run, daemon=True).start()
+
+    def _count(self, key):
+        with self.lock: self.stats[key] += 1
+
+    def summary(self):
+        s = self.stats
+        return (f"{s['submitted']} inputs -> {s['dispatched']} requests "
+                f"({s['coalesced']} coalesced, {s['dropped']} dropped before send, "
+                f"{s['cancelled']} cancelled in flight, {s['completed']} completed)")
+
+
+# --- SPECULATIVE DRAFTS ---
+# While the prospect is still talking, RealtimeSTT's stabilized partial text is used to
+# draft a cue. The draft's output is held back; when the final transcript arrives it is
+# either committed (shown at once) or dropped and the final goes through the scheduler.
+# Drafts share the scheduler's API slots, and each utterance gets at most MAX_DRAFTS of them;
+# a superseded draft's stream is closed right away rather than at its next chunk.
+# A draft's cue only reaches on_cue (the stage tracker) once the draft is committed.
+
+class SpeculativeDraft:
+    speculative = True
+    abandoned = False
+
+    def __init__(self, partial, emit, on_cue=None):
+        self.partial = partial
+        self.words = normalize(partial).split()
+        self.forward = emit
+        self.on_cue = on_cue or (lambda cue: None)
+        self.lock = threading.Lock()
+        self.buffer = []
+        self.committed = False
+        self.cancelled = False
+        self.stream = None
+        self.cue = None
+
+    @property
+    def stale(self): return self.cancelled
+
+    def emit(self, msg):
+        with self.lock:
+            if self.cancelled: return
+            if self.committed: self.forward(msg)
+            else: self.buffer.append(msg)
+
+    def commit(self):
+        with self.lock:
+            self.committed = True
+            for msg in self.buffer: self.forward(msg)
+            self.buffer = []
+            cue = self.cue
+        if cue: self.on_cue(cue)
+
+    def finish(self, cue):
+        """Worker side: the draft's cue, passed on now if it's committed, else when (if) it is."""
+        with self.lock:
+            if self.cancelled: return
+            self.cue = cue
+            committed = self.committed
+        if committed: self.on_cue(cue)
+
+    def attach(self, stream):
+        """The worker's open API stream, so cancel() can close it without waiting for the next chunk."""
+        with self.lock:
+            self.stream = stream
+            if not self.cancelled: return
+        self._close(stream)
+
+    def cancel(self):
+        with self.lock:
+            self.cancelled = True
+            stream, self.stream = self.stream, None
+        if stream: self._close(stream)
+
+    @staticmethod
+    def _close(stream):
+        try: stream.close()
+        except Exception: pass
+
+    def matches(self, final):
+        final_words = normalize(final).split()
+        if not final_words or not self.words: return False
+        if final_words[:len(self.words)] == self.words and len(final_words) - len(self.words) < DRAFT_REGROW_WORDS: return True
+        a, b = set(self.words), set(final_words)
+        return len(a & b) / len(a | b) >= COMMIT_MATCH
+
+
+class Speculator:
+    def __init__(self, scheduler, worker, on_cue=None):
+        self.scheduler = scheduler
+        self.worker = worker  # same worker(text, job) as the scheduler; job.speculative is True
+        self.on_cue = on_cue  # on_cue(cue) for each committed draft's cue
+        self.lock = threading.Lock()
+        self.draft = None
+        self.drafted = 0  # drafts started for the current utterance
+        self.stats = {"drafts": 0, "committed": 0, "reissued": 0}
+
+    def partial(self, text):
+        """Called from the recorder's realtime thread with stabilized partial text."""
+        words = normalize(text).split()
+        with self.lock:
+            if len(words) < DRAFT_MIN_WORDS or self.drafted >= MAX_DRAFTS: return
+            if self.draft and len(words) - len(self.draft.words) < REDRAFT_WORDS: return
+            old, self.draft = self.draft, SpeculativeDraft(text, self.scheduler.emit, self.on_cue)
+            self.drafted += 1
+            self.stats["drafts"] += 1
+            draft = self.draft
+        if old: old.cancel()  # closes its stream now, which frees the slot for the re-draft
+        self.scheduler.run_draft(draft)
+
+    def final(self, text):
+        """Returns True if the pending draft covers this final transcript and has been committed."""
+        with self.lock:
+            draft, self.draft = self.draft, None
+            self.drafted = 0
+        if not draft: return False
+        if draft.matches(text) and self.scheduler.supersede():
+            draft.commit()
+            self.stats["committed"] += 1
+            return True
+        draft.cancel()
+        self.stats["reissued"] += 1
+        return False
+
+    def summary(self):
+        s = self.stats
+        return f"{s['drafts']} drafts, {s['committed']} committed, {s['reissued']} re-issued"
@@ -1,6 +1,6 @@
-﻿import pyaudio
-import os
+﻿import os
 import sys
+import devices
 
 # Force UTF-8
 sys.stdout.reconfigure(encoding='utf-8')
@@ -19,26 +19,19 @@ def main():
         return
 
     # --- 2. SELECT AUDIO SOURCE ---
-    p = pyaudio.PyAudio()
     print('\n[STEP 2] SELECT AUDIO SOURCE')
     print('To hear the CALL (System Audio), look for "Stereo Mix", "Loopback", or "Voicemeeter Output".')
-    print('To hear YOURSELF, look for "Microphone".\n')
+    print('To hear YOURSELF, look for "Microphone".')
+    print(f'\nListening to every input for {devices.LISTEN_S:.1f}s - play some call audio or speak now...\n')
     
-    print(f'{'ID':<4} | {'DEVICE NAME':<40}')
-    print('-'*50)
+    probes = devices.probe_all()
+    print(devices.table(probes))
+    print('-'*84)
     
-    valid_ids = []
-    for i in range(p.get_device_count()):
-        try:
-            info = p.get_device_info_by_index(i)
-            if info['maxInputChannels'] > 0:
-                print(f"{i:<4} | {info['name'][:40]}")
-                valid_ids.append(str(i))
-        except: pass
-        
-    print('-'*50)
-    
-    dev_index = input('Enter the ID number to use: ').strip()
+    valid_ids = [str(probe.index) for probe in probes]
+    suggested = devices.best([probe for probe in probes if probe.heard])
+    prompt = f'Enter the ID number to use [{suggested.index}]: ' if suggested else 'Enter the ID number to use: '
+    dev_index = input(prompt).strip() or (str(suggested.index) if suggested else "")
     
     if dev_index not in valid_ids:
         print('⚠️ Invalid ID selected. Defaulting to 1.')
@@ -0,0 +1,136 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+import applog
+import backend
+import lazy
+import stt_calibrate
+
+RealtimeSTT = lazy.lazy("RealtimeSTT")  # pulls in torch: the slowest import we have
+dual_capture = lazy.lazy("dual_capture")
+log = applog.get("startup")
+
+# --- STARTUP ORCHESTRATION ---
+# The HUD window goes up first; the STT engine loads behind it. The resolved microphone is
+# cached with a fingerprint of the input devices, so on a normal start the cached index is
+# used straight away and the (slow) PyAudio enumeration only re-checks it in parallel with
+# the model load. Every phase is timed.
+
+DEVICE_CACHE_FILE = "device_cache.json"
+
+
+class StartupTimer:
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.lock = threading.Lock()
+        self.phases = []  # (name, seconds, note)
+
+    @contextmanager
+    def phase(self, name, note=""):
+        started = time.perf_counter()
+        try: yield
+        finally: self.record(name, time.perf_counter() - started, note)
+
+    def record(self, name, seconds, note=""):
+        with self.lock: self.phases.append((name, seconds, note))
+
+    def mark(self, name):
+        """Records time since process start (e.g. "window shown")."""
+        self.record(name, time.perf_counter() - self.t0, "since start")
+
+    def report(self):
+        with self.lock:
+            parts = [f"{name} {secs:.2f}s" + (f" ({note})" if note else "") for name, secs, note in self.phases]
+        return " | ".join(parts)
+
+
+def device_fingerprint(devices):
+    return hashlib.sha1(json.dumps(sorted(devices)).encode("utf-8")).hexdigest()
+
+
+def load_device_cache():
+    """Cached {"fingerprint", "mic_name", "index", "name"}, if it was made for the current MIC_NAME."""
+    try:
+        with open(DEVICE_CACHE_FILE, "r", encoding="utf-8") as f: cache = json.load(f)
+    except (OSError, ValueError): return None
+    return cache if cache.get("mic_name") == os.getenv("MIC_NAME", "Voicemeeter") else None
+
+
+def save_device_cache(devices, index, name):
+    cache = {"fingerprint": device_fingerprint(devices), "mic_name": os.getenv("MIC_NAME", "Voicemeeter"), "index": index, "name": name}
+    with open(DEVICE_CACHE_FILE, "w", encoding="utf-8") as f: json.dump(cache, f)
+    return cache
+
+
+def detect_mic():
+    """Full enumeration + pick; refreshes the cache. Returns the cache dict."""
+    devices = backend.list_input_devices()
+    index, name = backend.pick_mic(devices)
+    return save_device_cache(devices, index, name)
+
+
+def build_recorder(mic_idx):
+    # REP_MIC_NAME set: capture the rep's own mic as [ME] alongside the call audio (dual_capture.py)
+    rep_mic = os.getenv("REP_MIC_NAME")
+    if rep_mic:
+        rep_idx, rep_name = backend.pick_mic(backend.list_input_devices(), rep_mic)
+        if rep_name and rep_idx != mic_idx: return dual_capture.DualCapture(mic_idx, rep_idx)
+        log.warning("⚠️ REP MIC '%s' not found (or same as the call device). Single-channel capture.", rep_mic)
+    # Models / compute type come from stt_calibrate.py (defaults: tiny + int8, safe on Windows CPU)
+    config, _ = stt_calibrate.load_config()
+    return RealtimeSTT.AudioToTextRecorder(
+        model=config["final"]["model"], 
+        realtime_model_type=config["realtime"]["model"],
+        language="en", 
+        spinner=False, 
+        enable_realtime_transcription=True, 
+        input_device_index=mic_idx,
+        compute_type=config["final"]["compute_type"],
+        no_log_file=True  # its logger goes through applog (rotated JSONL) instead of realtimesst.log
+    )
+
+
+def load_engine(timer, on_status, on_ready):
+    """Runs on a background thread: resolve the mic, load STT, hand the recorder to the HUD."""
+    try:
+        cache = load_device_cache()
+        check = {}
+        if cache:
+            # Optimistic: start loading on the cached mic, verify the hardware in parallel
+            def verify():
+                with timer.phase("mic_verify", "parallel"):
+                    devices = backend.list_input_devices()
+                    check["changed"] = device_fingerprint(devices) != cache["fingerprint"]
+                    if check["changed"]: check["cache"] = save_device_cache(devices, *backend.pick_mic(devices))
+            verifier = threading.Thread(target=verify, daemon=True)
+            verifier.start()
+            timer.record("mic_detect", 0.0, f"cached index {cache['index']}")
+        else:
+            on_status("DETECTING MIC")
+            with timer.phase("mic_detect", "no cache"): cache = detect_mic()
+            verifier = None
+
+        on_status("LOADING STT")
+        with timer.phase("stt_load"): recorder = build_recorder(cache["index"])
+
+        if verifier:
+            verifier.join()
+            if check.get("changed") and check["cache"]["index"] != cache["index"]:
+                log.warning("⚠️ AUDIO DEVICES CHANGED: switching to '%s' (index %s).", check["cache"]["name"], check["cache"]["index"])
+                on_status("RELOADING STT")
+                recorder.shutdown()
+                with timer.phase("stt_reload", "hardware changed"): recorder = build_recorder(check["cache"]["index"])
+
+        timer.mark("stt_ready")
+        log.info("✅ AUDIO ENGINE READY.")
+        log.info("STARTUP: %s", timer.report())
+        log.info("LAZY IMPORTS: %s", lazy.report())
+        on_ready(recorder)
+        # Queued after "ready", so the prompt replaces STT: READY instead of being overwritten by it
+        if stt_calibrate.read_config()[1] == "stale": on_status("DEFAULTS - HARDWARE CHANGED, RECALIBRATE WITH A CALL RECORDING")
+    except Exception as e:
+        log.critical("CRITICAL ERROR: Audio engine failed to start: %s", e, exc_info=True)
+        on_status("STT FAILED")
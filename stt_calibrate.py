@@ -0,0 +1,153 @@
+import json
+import os
+import platform
+import re
+import sys
+import time
+import applog
+from lazy import lazy
+
+faster_whisper = lazy("faster_whisper")
+log = applog.get("stt")
+
+# --- STT CALIBRATION ---
+# Usage: python stt_calibrate.py [sample.wav] [reference.txt]
+# Benchmarks faster_whisper models x compute types on this CPU and keeps the most accurate
+# model that holds its real-time-factor target (RTF = transcribe time / audio length).
+# The realtime model re-transcribes a growing buffer several times a second, so it gets a
+# much tighter target than the final model. RealtimeSTT shares one compute_type between
+# both models, so the models are picked independently *per* compute type and the best pair
+# wins. Configs that fail to load here (the "Error initializing faster_whisper" case) are
+# simply skipped. Each model is loaded once per compute type and measured at both beam sizes.
+# The result is saved with a hardware fingerprint; startup falls back to defaults when the
+# hardware changes and the HUD's STT status asks for a re-run.
+#
+# Sample audio: a recorded call (any format PyAV reads, ~20-30 s of call speech), with its exact
+# transcript for the accuracy (WER) column. No clip ships with the repo: record one on the
+# rep's own setup, or drop it in as samples/calibration.wav (+ .txt) to run with no arguments.
+
+CANDIDATE_MODELS = ["tiny.en", "base.en", "small.en", "medium.en"]  # least -> most accurate
+COMPUTE_TYPES = ["int8", "int8_float32", "float32"]                 # least -> most precise
+FINAL_TARGET_RTF = 0.3
+REALTIME_TARGET_RTF = 0.1
+FINAL_BEAM_SIZE = 5      # RealtimeSTT defaults
+REALTIME_BEAM_SIZE = 3
+SAMPLE_AUDIO = os.path.join("samples", "calibration.wav")
+SAMPLE_TEXT = os.path.join("samples", "calibration.txt")
+CONFIG_FILE = "stt_config.json"
+
+DEFAULT_CONFIG = {"final": {"model": "tiny", "compute_type": "int8"}, "realtime": {"model": "tiny"}}
+
+
+def hardware_fingerprint():
+    return {"machine": platform.machine(), "processor": platform.processor(), "cpus": os.cpu_count(), "system": platform.system()}
+
+
+def read_config():
+    """Returns (config, state): "calibrated", "default" (never run) or "stale" (hardware changed since)."""
+    try:
+        with open(CONFIG_FILE, "r", encoding="utf-8") as f: config = json.load(f)
+    except (OSError, ValueError): return DEFAULT_CONFIG, "default"
+    if config.get("hardware") != hardware_fingerprint(): return DEFAULT_CONFIG, "stale"
+    return config, "calibrated"
+
+
+def load_config():
+    """Returns (config, calibrated). Falls back to DEFAULT_CONFIG if never run or the hardware changed."""
+    config, state = read_config()
+    if state == "stale": log.warning("⚠️ STT: Hardware changed since calibration. Using defaults - run 'python stt_calibrate.py <call.wav> [transcript.txt]'.")
+    return config, state == "calibrated"
+
+
+def word_error_rate(reference, hypothesis):
+    ref = re.sub(r"[^\w\s']", " ", reference.lower()).split()
+    hyp = re.sub(r"[^\w\s']", " ", hypothesis.lower()).split()
+    if not ref: return 0.0
+    row = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        prev, row[0] = row[0], i
+        for j, h in enumerate(hyp, 1):
+            prev, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, prev + (r != h))
+    return row[-1] / len(ref)
+
+
+def load_model(model_name, compute_type):
+    """WhisperModel for one config, or None if it can't load on this machine."""
+    try: return faster_whisper.WhisperModel(model_name, device="cpu", compute_type=compute_type)
+    except Exception as e:
+        print(f"   {model_name:<10} {compute_type:<13} FAILED: {e}")
+        return None
+
+
+def measure(model, model_name, compute_type, audio, duration, reference, beam_size):
+    """Returns {"rtf", "wer"} for one config, or None if it can't run on this machine."""
+    try:
+        list(model.transcribe(audio[:16000], language="en", beam_size=beam_size)[0])  # warm-up
+        started = time.perf_counter()
+        segments, _ = model.transcribe(audio, language="en", beam_size=beam_size)
+        text = " ".join(s.text for s in segments)  # segments are lazy: this is where the work happens
+        rtf = (time.perf_counter() - started) / duration
+    except Exception as e:
+        print(f"   {model_name:<10} {compute_type:<13} FAILED: {e}")
+        return None
+    wer = word_error_rate(reference, text) if reference else None
+    print(f"   {model_name:<10} {compute_type:<13} RTF {rtf:.3f}" + (f"  WER {wer:.1%}" if wer is not None else ""))
+    return {"rtf": rtf, "wer": wer}
+
+
+def pick(results, target):
+    """Most accurate model under the RTF target: lowest WER if we have a reference, else the largest model."""
+    ok = [(m, r) for m, r in results.items() if r and r["rtf"] <= target]
+    if not ok: return None
+    if all(r["wer"] is not None for _, r in ok):
+        return min(ok, key=lambda mr: (mr[1]["wer"], -CANDIDATE_MODELS.index(mr[0])))
+    return max(ok, key=lambda mr: CANDIDATE_MODELS.index(mr[0]))
+
+
+def calibrate(audio_path=SAMPLE_AUDIO, reference_path=SAMPLE_TEXT):
+    audio = faster_whisper.decode_audio(audio_path, sampling_rate=16000)
+    duration = len(audio) / 16000
+    reference = open(reference_path, encoding="utf-8").read() if os.path.exists(reference_path) else None
+    print(f"Calibrating on {audio_path} ({duration:.1f}s){'' if reference else ' - no reference transcript, ranking by model size'}")
+
+    best = None
+    for compute_type in COMPUTE_TYPES:
+        print(f"\n[{compute_type}]")
+        final, realtime = {}, {}
+        for model_name in CANDIDATE_MODELS:
+            model = load_model(model_name, compute_type)
+            final[model_name] = model and measure(model, model_name, compute_type, audio, duration, reference, FINAL_BEAM_SIZE)
+            if not final[model_name]: continue
+            if final[model_name]["rtf"] > FINAL_TARGET_RTF * 3: break  # bigger models only get slower
+            realtime[model_name] = measure(model, model_name, compute_type, audio, duration, reference, REALTIME_BEAM_SIZE)
+            del model  # free it before the next (bigger) one loads
+        f, r = pick(final, FINAL_TARGET_RTF), pick(realtime, REALTIME_TARGET_RTF)
+        if not f or not r: continue
+        # Prefer the better final model, then the better realtime model, then more precision
+        score = (CANDIDATE_MODELS.index(f[0]), CANDIDATE_MODELS.index(r[0]), COMPUTE_TYPES.index(compute_type))
+        if best is None or score > best[0]: best = (score, compute_type, f, r)
+
+    if not best:
+        print(f"\n❌ Nothing met the targets (final RTF {FINAL_TARGET_RTF}, realtime RTF {REALTIME_TARGET_RTF}). Keeping defaults.")
+        return DEFAULT_CONFIG
+
+    _, compute_type, (final_model, final_res), (rt_model, rt_res) = best
+    config = {
+        "final": {"model": final_model, "compute_type": compute_type, **final_res},
+        "realtime": {"model": rt_model, **rt_res},
+        "hardware": hardware_fingerprint(),
+        "calibrated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    with open(CONFIG_FILE, "w", encoding="utf-8") as f: json.dump(config, f, indent=2)
+    print(f"\n✅ SAVED: final {final_model} / realtime {rt_model} @ {compute_type} -> {CONFIG_FILE}")
+    return config
+
+
+if __name__ == "__main__":
+    audio_path = sys.argv[1] if len(sys.argv) > 1 else SAMPLE_AUDIO
+    reference_path = sys.argv[2] if len(sys.argv) > 2 else SAMPLE_TEXT
+    if not os.path.exists(audio_path):
+        print(f"❌ Sample audio not found: {audio_path}\n"
+              "   Record ~20-30 s of a call on this machine and run: python stt_calibrate.py <call.wav> [transcript.txt]")
+        sys.exit(1)
+    calibrate(audio_path, reference_path)
@@ -21,6 +21,7 @@ THEMES = {
         "menu_bg": "#2d2d2d",
         "menu_fg": "#ffffff",
         "border": "#3e3e42",      
+        "key_bold": SHARED["key_highlight"],
         "icon": "☀️"              
     },
     "light": {
@@ -35,6 +36,33 @@ THEMES = {
         "menu_bg": "#ffffff",
         "menu_fg": "#000000",
         "border": "#d4d4d4",      
+        "key_bold": "#0055bb",
         "icon": "🌙"              
     }
 }
+
+# Keys that jump straight to the target theme instead of fading
+SNAP_KEYS = ("icon", "menu_bg", "menu_fg")
+
+_transitions = {}
+
+def transition(start, end, steps):
+    """Every palette of a start->end fade, computed once per (start, end, steps) and reused."""
+    key = (start, end, steps)
+    if key not in _transitions:
+        a, b = THEMES[start], THEMES[end]
+        rgb = {k: (_hex(a[k]), _hex(b[k])) for k in b if b[k].startswith("#") and k not in SNAP_KEYS}
+        frames = []
+        for i in range(steps + 1):
+            t = i / steps
+            frame = {k: _mix(p1, p2, t) for k, (p1, p2) in rgb.items()}
+            frame.update({k: b[k] for k in SNAP_KEYS})
+            frames.append(frame)
+        _transitions[key] = frames
+    return _transitions[key]
+
+def _hex(color): return int(color[1:3], 16), int(color[3:5], 16), int(color[5:7], 16)
+
+def _mix(c1, c2, t):
+    r, g, b = (int(a + (b - a) * t) for a, b in zip(c1, c2))
+    return f"#{r:02x}{g:02x}{b:02x}"
@@ -0,0 +1,27 @@
+import missions
+
+MISSION = """# MISSION: SELL DRONES
+# GOAL: Book a demo
+# --- STAGE 1: THE OPENER ---
+- "Hi, this is Josh. The T50 covers 40 acres an hour."
+- "Most farms run a T50 and a 3D mapper."
+# --- STAGE 2: THE PITCH ---
+- "It pays for itself in about 2,000 acres, at $1.50/acre less than a plane."
+- "Ask about the T50 demo day."
+"""
+
+
+def test_key_numbers_skip_model_names():
+    mission = missions.parse(MISSION, "SELL_DRONES")
+    numbers = [sentence for _, sentence in mission.numbers]
+    assert "The T50 covers 40 acres an hour." in numbers
+    assert "It pays for itself in about 2,000 acres, at $1.50/acre less than a plane." in numbers
+    assert "Most farms run a T50 and a 3D mapper." not in numbers
+    assert "Ask about the T50 demo day." not in numbers
+
+
+def test_number_re_tokens():
+    assert missions.NUMBER_RE.search("up to 20% off")
+    assert missions.NUMBER_RE.search("$1.50/acre")
+    assert not missions.NUMBER_RE.search("the DJI T50")
+    assert not missions.NUMBER_RE.search("a 4th field")
@@ -0,0 +1,70 @@
+import time
+import styles
+
+# --- THEME ENGINE ---
+# Widgets register which palette key drives which option once, at build time. Applying a
+# palette then only reconfigures options whose value actually changed since the last
+# frame, and a fade never spends more than FRAME_BUDGET_MS of Tk time per tick: targets
+# that don't fit are picked up next tick, and frames that fall behind the clock are skipped.
+
+STEPS = 10
+FRAME_DELAY_MS = 20
+FRAME_BUDGET_MS = 8.0
+
+
+class ThemeEngine:
+    def __init__(self, root):
+        self.root = root
+        self.targets = []  # [apply(**options), {option: palette key}, {option: last applied value}]
+        self.generation = 0
+        self.stats = {"frames": 0, "configures": 0, "skipped_frames": 0, "over_budget": 0}
+
+    def bind(self, apply, **options):
+        """e.g. bind(self.header.config, bg="header") or bind(style_fn, troughcolor="scroll_bg")."""
+        self.targets.append([apply, options, {}])
+
+    def apply(self, palette, start=0):
+        """Pushes changed options to targets[start:]; returns where it stopped if the budget ran out."""
+        began = time.perf_counter()
+        for i in range(start, len(self.targets)):
+            apply, options, last = self.targets[i]
+            changed = {opt: palette[key] for opt, key in options.items() if last.get(opt) != palette[key]}
+            if changed:
+                apply(**changed)
+                last.update(changed)
+                self.stats["configures"] += 1
+            if (time.perf_counter() - began) * 1000 > FRAME_BUDGET_MS and i + 1 < len(self.targets):
+                self.stats["over_budget"] += 1
+                return i + 1
+        return None
+
+    def apply_all(self, palette):
+        """Applies a palette in one go (startup / no animation), cancelling any running fade."""
+        self.generation += 1
+        resume_at = 0
+        while resume_at is not None: resume_at = self.apply(palette, resume_at)
+
+    def fade(self, start_theme, end_theme):
+        """Animates start->end over STEPS frames on the Tk loop. A newer fade cancels this one."""
+        self.generation += 1
+        generation = self.generation
+        frames = styles.transition(start_theme, end_theme, STEPS)
+        began = time.perf_counter()
+        duration = STEPS * FRAME_DELAY_MS / 1000
+
+        def tick(shown, resume_at):
+            if generation != self.generation: return
+            # Where the clock says we should be; frames we fell behind on are skipped, not replayed
+            due = min(STEPS, int((time.perf_counter() - began) / duration * STEPS))
+            index = shown if resume_at is not None else min(STEPS, max(due, shown + 1))
+            if resume_at is None and index > shown + 1: self.stats["skipped_frames"] += index - shown - 1
+            left_off = self.apply(frames[index], resume_at or 0)
+            self.stats["frames"] += 1
+            if left_off is not None: self.root.after(1, lambda: tick(index, left_off))
+            elif index < STEPS: self.root.after(FRAME_DELAY_MS, lambda: tick(index, None))
+
+        tick(-1, None)
+
+    def summary(self):
+        s = self.stats
+        return f"{s['frames']} frames, {s['configures']} configures, {s['skipped_frames']} skipped, {s['over_budget']} over budget"
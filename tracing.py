@@ -0,0 +1,138 @@
+import bisect
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+# --- LATENCY TRACING ---
+# Follows each utterance from the end of speech to the cue on screen:
+#   speech_end -> recording_stop -> text_returned -> request_sent -> first_token -> final_token -> rendered
+# speech_end is estimated as RealtimeSTT's recording stop minus its post-speech silence window
+# (the recorder only stops after that much silence). Only the latest utterance is traced;
+# one still unfinished when the next transcript arrives (latest wins) is counted as superseded.
+# Durations go into fixed-bucket histograms (constant memory for any call length) and,
+# when enabled, one JSONL line per utterance in logs/traces/.
+
+TRACE_DIR = os.path.join("logs", "traces")
+BUCKETS_MS = [10, 25, 50, 100, 200, 350, 500, 750, 1000, 1500, 2000, 3000, 5000, 10000]  # upper bounds; last bucket is open
+SPANS = [  # (name, from mark, to mark)
+    ("endpoint", "speech_end", "recording_stop"),  # VAD silence window
+    ("stt", "recording_stop", "text_returned"),    # final whisper pass
+    ("schedule", "text_returned", "request_sent"), # debounce + prompt build
+    ("first_token", "request_sent", "first_token"),
+    ("stream", "first_token", "final_token"),
+    ("render", "final_token", "rendered"),         # GUI pump until the cue is drawn
+    ("total", "speech_end", "rendered"),
+]
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.n = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.n += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def percentile(self, p):
+        """Upper bound of the bucket holding the p-th percentile (the max for the open bucket)."""
+        if not self.n: return None
+        rank = p / 100 * self.n
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count: return min(self.buckets[i], self.max) if i < len(self.buckets) else self.max
+        return self.max
+
+
+class LatencyTracer:
+    def __init__(self, export=False, on_trace=None, directory=TRACE_DIR):
+        self.on_trace = on_trace  # on_trace(trace), called on the Tk thread after each finished trace
+        self.lock = threading.Lock()
+        self.current = None
+        self.stopped = None  # marks from the last recording stop, picked up by the next text()
+        self.last = None
+        self.histograms = {name: Histogram() for name, _, _ in SPANS}
+        self.stats = {"traced": 0, "superseded": 0}
+        self.file = None
+        if export:
+            os.makedirs(directory, exist_ok=True)
+            self.file = open(os.path.join(directory, f"trace_{datetime.now().strftime('%Y-%m-%d_%H%M%S')}.jsonl"), "a", encoding="utf-8")
+
+    def speech_end(self, silence=0.0):
+        """Recorder callback (on_recording_stop). `silence` is the recorder's post-speech silence window."""
+        now = time.perf_counter()
+        with self.lock: self.stopped = {"speech_end": now - silence, "recording_stop": now}
+
+    def text_returned(self, text):
+        """A new final transcript makes any unfinished trace stale, same as in the scheduler."""
+        with self.lock:
+            if self.current: self.stats["superseded"] += 1
+            self.current, self.stopped = self.stopped or {}, None
+            self.current["text_returned"] = time.perf_counter()
+            self.current["text"] = text
+
+    def speculative(self):
+        """The final transcript matched a speculative draft; its buffered cue renders next."""
+        with self.lock:
+            if self.current: self.current["speculative"] = True
+
+    def request_sent(self, job=None):
+        if job is not None and job.speculative: return
+        with self.lock:
+            if self.current is None or "request_sent" in self.current: self.current = {}  # forced (SPACE) request
+            self.current["request_sent"] = time.perf_counter()
+            self.current["job"] = job
+
+    def mark(self, stage, job=None):
+        """first_token / final_token, only for the job the current trace is waiting on."""
+        with self.lock:
+            t = self.current
+            if t is None or t.get("job") is not job or stage in t: return
+            t[stage] = time.perf_counter()
+
+    def rendered(self):
+        """Called from _update_cue / _end_cue_stream on the Tk thread."""
+        with self.lock:
+            t = self.current
+            if t is None or not ("final_token" in t or t.get("speculative")): return
+            t["rendered"] = time.perf_counter()
+            self.current = None
+            trace = {"at": datetime.now().isoformat(timespec="seconds"), "text": t.get("text", ""), "speculative": bool(t.get("speculative"))}
+            for name, start, end in SPANS:
+                if start in t and end in t:
+                    ms = (t[end] - t[start]) * 1000
+                    trace[name] = round(ms, 1)
+                    self.histograms[name].add(ms)
+            self.stats["traced"] += 1
+            self.last = trace
+            if self.file:
+                self.file.write(json.dumps(trace, ensure_ascii=False) + "\n")
+                self.file.flush()
+        if self.on_trace: self.on_trace(trace)
+
+    def overlay_text(self, trace=None):
+        t = trace or self.last
+        if not t: return "LATENCY: waiting for first cue"
+        parts = [f"{name} {t[name] / 1000:.2f}s" for name, _, _ in SPANS if name in t]
+        return "LATENCY: " + " | ".join(parts) + ("  (draft)" if t["speculative"] else "")
+
+    def summary(self):
+        s = self.stats
+        if not s["traced"]: return f"no traced cues ({s['superseded']} superseded)"
+        rows = []
+        for name, _, _ in SPANS:
+            h = self.histograms[name]
+            if h.n: rows.append(f"{name} p50≤{h.percentile(50):.0f}/p95≤{h.percentile(95):.0f}/max {h.max:.0f}")
+        return f"{s['traced']} cues, {s['superseded']} superseded; ms: " + ", ".join(rows)
+
+    def close(self):
+        if self.file: self.file.close()
+        self.file = None
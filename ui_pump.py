@@ -0,0 +1,99 @@
+import collections
+import threading
+import time
+import tkinter as tk
+import applog
+
+log = applog.get("gui")
+
+# --- GUI UPDATE PUMP ---
+# Replaces the 50 ms get_nowait() poll. Worker threads put() messages; the first message
+# of a frame schedules one Tk callback, later ones just queue up behind it. Each frame
+# hands every pending message to the HUD, and whatever the handlers write() is collected
+# per widget and applied as ONE insert and ONE see(END) per widget. No work, no wakeups.
+
+FRAME_MS = 16
+MAX_MESSAGES_PER_FRAME = 500  # a runaway burst spills into the next frame instead of freezing this one
+STATS_WINDOW = 500
+
+
+class UpdatePump:
+    def __init__(self, root, handler):
+        self.root = root
+        self.handler = handler  # handler(msg, content), called on the Tk thread
+        self.lock = threading.Lock()
+        self.pending = collections.deque()
+        self.scheduled = False
+        self.writes = {}  # widget -> [text, tags, text, tags, ...] for a single Text.insert
+        self.frame_ms = collections.deque(maxlen=STATS_WINDOW)
+        self.depths = collections.deque(maxlen=STATS_WINDOW)
+        self.stats = {"frames": 0, "messages": 0, "inserts": 0, "max_depth": 0}
+
+    def put(self, item):
+        """Same call shape as queue.Queue.put, safe from any thread."""
+        with self.lock:
+            self.pending.append(item)
+            if self.scheduled: return
+            self.scheduled = True
+        self._schedule()
+
+    def start(self):
+        """Call once the mainloop runs, to pick up anything queued before it did."""
+        with self.lock:
+            if self.scheduled or not self.pending: return
+            self.scheduled = True
+        self._schedule()
+
+    def write(self, widget, text, tags=()):
+        """Queues text for `widget` (a DarkScrolledText) to be inserted at END this frame."""
+        if isinstance(tags, str): tags = (tags,)
+        self.writes.setdefault(widget, []).extend((text, tags))
+        with self.lock:
+            if self.scheduled: return
+            self.scheduled = True
+        self._schedule()
+
+    def discard(self, widget):
+        """Drops pending writes for a widget that's about to be cleared."""
+        self.writes.pop(widget, None)
+
+    def _schedule(self):
+        try: self.root.after(FRAME_MS, self._frame)
+        except (RuntimeError, tk.TclError):
+            # mainloop not running yet / window gone; start() or the next put() retries
+            with self.lock: self.scheduled = False
+
+    def _frame(self):
+        started = time.perf_counter()
+        with self.lock:
+            depth = len(self.pending)
+            batch = [self.pending.popleft() for _ in range(min(depth, MAX_MESSAGES_PER_FRAME))]
+        for msg, content in batch:
+            try: self.handler(msg, content)
+            except Exception: log.exception("GUI ERROR: %s", msg)
+
+        for widget, parts in self.writes.items():
+            widget.insert(tk.END, *parts)
+            widget.see(tk.END)
+            self.stats["inserts"] += 1
+        self.writes = {}
+
+        self.frame_ms.append((time.perf_counter() - started) * 1000)
+        self.depths.append(depth)
+        self.stats["frames"] += 1
+        self.stats["messages"] += len(batch)
+        self.stats["max_depth"] = max(self.stats["max_depth"], depth)
+        with self.lock:
+            self.scheduled = False
+            if not self.pending: return
+            self.scheduled = True
+        self._schedule()
+
+    def summary(self):
+        s = self.stats
+        if not s["frames"]: return "no frames"
+        times = sorted(self.frame_ms)
+        p95 = times[int(len(times) * 0.95) - 1] if len(times) > 1 else times[0]
+        return (f"{s['frames']} frames, {s['messages']} messages, {s['inserts']} widget inserts, "
+                f"frame p50 {times[len(times) // 2]:.1f} ms / p95 {p95:.1f} ms / max {times[-1]:.1f} ms, "
+                f"queue depth avg {sum(self.depths) / len(self.depths):.1f} / max {s['max_depth']}")